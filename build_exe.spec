@@ -0,0 +1,82 @@
+# -*- mode: python ; coding: utf-8 -*-
+# PyInstaller spec for the Resume Updater executable.
+#
+# Using a spec file (instead of --collect-all=streamlit on the CLI) lets us
+# exclude the heavy transitive packages streamlit drags in but this app
+# never imports, and filter out demo/test data files after analysis —
+# roughly halving the bundle size.
+
+from PyInstaller.utils.hooks import collect_data_files
+
+APP_NAME = "ResumeUpdater"
+
+# Packages pulled in transitively but unused by the app
+EXCLUDES = [
+    'tkinter',
+    'matplotlib',
+    'pandas.tests',
+    'pyarrow.tests',
+    'numpy.tests',
+    'IPython',
+    'notebook',
+    'sphinx',
+    'pytest',
+    'setuptools',
+    'botocore',
+]
+
+# Data-file prefixes that are demo/test assets, not runtime requirements
+_DATA_DROP_PREFIXES = (
+    'streamlit/static/vendor',
+    'streamlit/hello',
+)
+
+
+def _keep_data(entry):
+    dest = entry[0].replace('\\', '/')
+    if dest.startswith(_DATA_DROP_PREFIXES):
+        return False
+    if dest.endswith('.map'):
+        return False
+    return True
+
+
+a = Analysis(
+    ['streamlit_app.py'],
+    pathex=[],
+    binaries=[],
+    datas=collect_data_files('streamlit', excludes=['**/tests/**', '**/*.map']),
+    hiddenimports=['openai', 'google.generativeai', 'pdfplumber'],
+    hookspath=[],
+    runtime_hooks=[],
+    excludes=EXCLUDES,
+    noarchive=False,
+)
+
+# Post-analysis filter: drop demo assets and source maps that survived hooks
+a.datas = [d for d in a.datas if _keep_data(d)]
+
+pyz = PYZ(a.pure)
+
+# onedir layout: the launcher EXE stays small and the payload ships
+# alongside it, so startup skips the ~250MB onefile unpack to %TEMP%
+# that taxed every launch.
+exe = EXE(
+    pyz,
+    a.scripts,
+    exclude_binaries=True,
+    name=APP_NAME,
+    debug=False,
+    strip=False,
+    upx=False,
+    console=True,
+)
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    name=APP_NAME,
+)
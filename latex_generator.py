@@ -3,37 +3,106 @@ LaTeX Template Generator Module
 Handles LaTeX template creation and management
 """
 
+import functools
+import hashlib
+import re
+import shutil
 import subprocess
 import platform
 from pathlib import Path
 from typing import Optional, Tuple
 
+import resume_parser
 
-class LaTeXGenerator:
-    """Manages LaTeX templates and generates base template structure"""
-    
-    def __init__(self, template_dir: Optional[str] = None):
-        """
-        Initialize LaTeX generator
-        
-        Args:
-            template_dir: Directory containing LaTeX templates (optional)
-        """
-        if template_dir:
-            self.template_dir = Path(template_dir)
-        else:
-            self.template_dir = Path(__file__).parent / "templates"
-        
-        self.template_dir.mkdir(exist_ok=True)
-    
-    def get_default_template(self) -> str:
-        """
-        Get default LaTeX resume template structure
-        
-        Returns:
-            LaTeX template string
-        """
-        return r"""
+# Translation table for LaTeX special characters in plain body text
+_LATEX_ESCAPES = str.maketrans({
+    '\\': r'\textbackslash{}',
+    '%': r'\%',
+    '&': r'\&',
+    '$': r'\$',
+    '#': r'\#',
+    '_': r'\_',
+    '{': r'\{',
+    '}': r'\}',
+    '^': r'\textasciicircum{}',
+    '~': r'\textasciitilde{}',
+})
+
+# Self-contained pdflatex preamble for the deterministic renderer (the
+# default template depends on LuaLaTeX + external JSON data, so the
+# renderer ships its own fill-in-able structure with matching styling)
+_RENDER_PREAMBLE = r"""\documentclass[letterpaper,11pt]{article}
+
+\usepackage{latexsym}
+\usepackage[empty]{fullpage}
+\usepackage{titlesec}
+\usepackage[usenames,dvipsnames]{color}
+\usepackage{enumitem}
+\usepackage{fancyhdr}
+\usepackage[hidelinks]{hyperref}
+
+\pagestyle{fancy}
+\fancyhf{}
+\fancyfoot{}
+\renewcommand{\headrulewidth}{0pt}
+\renewcommand{\footrulewidth}{0pt}
+
+\addtolength{\oddsidemargin}{-0.475in}
+\addtolength{\evensidemargin}{-0.375in}
+\addtolength{\textwidth}{1in}
+\addtolength{\topmargin}{-.5in}
+\addtolength{\textheight}{1.0in}
+
+\urlstyle{same}
+\raggedright
+\setlength{\tabcolsep}{0in}
+
+\titleformat{\section}{
+  \vspace{-4pt}\scshape\raggedright\large
+}{}{0em}{}[\color{black}\titlerule \vspace{-5pt}]
+
+\begin{document}
+"""
+
+_RENDER_POSTAMBLE = "\n\\end{document}\n"
+
+
+def _escape_latex(text: str) -> str:
+    """Escape LaTeX special characters in plain body text."""
+    return text.translate(_LATEX_ESCAPES)
+
+
+# Commands whose presence means a document may need a second pdflatex pass
+_XREF_PATTERN = re.compile(r'\\(ref|pageref|cite|tableofcontents|bibliography|listof)\b')
+
+# Intermediate-file suffixes left behind by pdflatex runs
+_INTERMEDIATE_SUFFIXES = frozenset({'.log', '.aux', '.out', '.fdb_latexmk', '.fls', '.toc', '.nav', '.snm'})
+
+# Log messages pdflatex emits when a rerun would change the output
+_RERUN_HINTS = (
+    "Rerun to get cross-references right",
+    "There were undefined references",
+    "Label(s) may have changed",
+)
+
+# Compiled-PDF cache shares the ~/.cache/resume_tailor root with the LLM
+# response and PDF-text caches; bounded so compiled user resumes don't
+# accumulate indefinitely
+_PDF_CACHE_DIR = Path.home() / ".cache" / "resume_tailor" / "compiled"
+_PDF_CACHE_MAX_ENTRIES = 64
+
+# Precompiled preamble formats (and the probe's scratch files) live in the
+# cache tree too, keyed by preamble hash
+_FMT_CACHE_DIR = Path.home() / ".cache" / "resume_tailor" / "formats"
+
+# Preamble hashes whose mylatexformat probe already failed this process;
+# sentinel files in _FMT_CACHE_DIR extend the memo across runs
+_failed_formats = set()
+
+
+# Default LaTeX resume template, built once at import time so every
+# get_default_template call returns the same string object
+_DEFAULT_TEMPLATE = r"""
         %-------------------------------------------
 % Resume in LuaLatex
 % Author: Kumar Pallav
@@ -159,14 +228,56 @@ require("lua/parser.lua")
 
 \end{document}
         """
+
+
+@functools.lru_cache(maxsize=1)
+def _pdflatex_available() -> bool:
+    """Check once per process whether pdflatex is on PATH"""
+    # A PATH lookup gives the same answer as spawning `pdflatex --version`
+    # without paying process + TeX-format startup on every compile
+    return shutil.which("pdflatex") is not None
+
+
+class LaTeXGenerator:
+    """Manages LaTeX templates and generates base template structure"""
     
-    def load_template(self, template_name: str) -> str:
+    def __init__(self, template_dir: Optional[str] = None):
         """
-        Load a LaTeX template from file
+        Initialize LaTeX generator
         
+        Args:
+            template_dir: Directory containing LaTeX templates (optional)
+        """
+        if template_dir:
+            self.template_dir = Path(template_dir)
+        else:
+            self.template_dir = Path(__file__).parent / "templates"
+
+        self.template_dir.mkdir(exist_ok=True)
+
+        # Compiled-PDF cache keyed by .tex content hash, so recompiling a
+        # byte-identical document skips the pdflatex subprocess chain
+        self.pdf_cache_dir = _PDF_CACHE_DIR
+        self.pdf_cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    def get_default_template(self) -> str:
+        """
+        Get default LaTeX resume template structure
+        
+        Returns:
+            LaTeX template string
+        """
+        return _DEFAULT_TEMPLATE
+    
+    @functools.lru_cache(maxsize=16)
+    def load_template(self, template_name: str) -> str:
+        """
+        Load a LaTeX template from file (cached — templates are read-only
+        for the lifetime of the process)
+
         Args:
             template_name: Name of the template file
-            
+
         Returns:
             Template content as string
         """
@@ -188,10 +299,103 @@ require("lua/parser.lua")
         """
         template_path = self.template_dir / template_name
         template_path.parent.mkdir(parents=True, exist_ok=True)
-        
+
         with open(template_path, 'w', encoding='utf-8') as f:
             f.write(content)
+
+        # Saved templates may shadow cached reads
+        self.load_template.cache_clear()
     
+    def render_from_transformed(self, transformed_content: str) -> str:
+        """
+        Render Stage-1 output into a complete LaTeX document without an LLM
+
+        Stage 1 emits a rigid Markdown structure ("### SECTION" headers,
+        "- " bullets, "**Category:** skills" lines), so formatting is a
+        deterministic parse + fill instead of a second 30-60 s LLM call.
+
+        Args:
+            transformed_content: Markdown-structured resume from Stage 1
+
+        Returns:
+            Complete LaTeX document ready to compile with pdflatex
+        """
+        parsed = resume_parser.parse_transformed(transformed_content)
+
+        parts = [_RENDER_PREAMBLE, self._render_header(parsed["header"])]
+
+        for section in parsed["sections"]:
+            title = section["title"]
+            parts.append(f"\\section{{{_escape_latex(title.title())}}}\n")
+            if 'SKILL' in title.upper() and parsed["skills"]:
+                parts.append(self._render_skills(parsed["skills"]))
+            else:
+                parts.append(self._render_entries(section["entries"]))
+
+        parts.append(_RENDER_POSTAMBLE)
+        return "".join(parts)
+
+    def wrap_document(self, body: str) -> str:
+        """
+        Wrap pre-rendered LaTeX body fragments in the standard document shell
+
+        Used by callers that produce section bodies independently (e.g. the
+        pipelined per-section formatter) and assemble the document locally.
+
+        Args:
+            body: LaTeX markup for the document body (no preamble/postamble)
+
+        Returns:
+            Complete LaTeX document ready to compile with pdflatex
+        """
+        return _RENDER_PREAMBLE + body.strip() + "\n" + _RENDER_POSTAMBLE
+
+    def _render_header(self, header_lines) -> str:
+        """Render the name/contact block above the first section"""
+        if not header_lines:
+            return ""
+
+        name = _escape_latex(header_lines[0])
+        rendered = [
+            "\\begin{center}\n",
+            f"  {{\\LARGE \\textbf{{{name}}}}}\\\\[4pt]\n",
+        ]
+        for line in header_lines[1:]:
+            rendered.append(f"  {_escape_latex(line)}\\\\\n")
+        rendered.append("\\end{center}\n\n")
+        return "".join(rendered)
+
+    def _render_entries(self, entries) -> str:
+        """
+        Render a section's parsed entries
+
+        Entry headings (company/role/date lines) are emitted in bold; each
+        entry's bullets become an itemize environment.
+        """
+        rendered = []
+
+        for entry in entries:
+            if entry["heading"]:
+                rendered.append(f"\\textbf{{{_escape_latex(entry['heading'])}}}\\\\\n")
+            if entry["bullets"]:
+                rendered.append("\\begin{itemize}[leftmargin=*,itemsep=0pt]\n")
+                for bullet in entry["bullets"]:
+                    rendered.append(f"  \\item {_escape_latex(bullet)}\n")
+                rendered.append("\\end{itemize}\n")
+
+        rendered.append("\n")
+        return "".join(rendered)
+
+    def _render_skills(self, skills) -> str:
+        """Render parsed {category: [skills]} as a compact list"""
+        rendered = ["\\begin{itemize}[leftmargin=*,itemsep=0pt,label={}]\n"]
+        for category, skill_list in skills.items():
+            rendered.append(
+                f"  \\item \\textbf{{{_escape_latex(category)}:}} {_escape_latex(', '.join(skill_list))}\n"
+            )
+        rendered.append("\\end{itemize}\n\n")
+        return "".join(rendered)
+
     def save_latex_output(self, latex_content: str, output_path: str):
         """
         Save final LaTeX document to file
@@ -240,17 +444,18 @@ require("lua/parser.lua")
         # Get the directory and filename without extension
         work_dir = tex_path.parent
         tex_filename = tex_path.name
+
+        # Cache hit: an identical .tex was compiled before — reuse its PDF
+        cache_key = hashlib.blake2b(tex_path.read_bytes(), digest_size=16).hexdigest()
+        cached_pdf = self.pdf_cache_dir / f"{cache_key}.pdf"
+        pdf_path = work_dir / f"{tex_path.stem}.pdf"
+
+        if cached_pdf.exists():
+            shutil.copy(cached_pdf, pdf_path)
+            return True, pdf_path
         
-        # Check if pdflatex is available
-        try:
-            # Test if pdflatex is in PATH
-            result = subprocess.run(
-                ["pdflatex", "--version"],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-        except (FileNotFoundError, subprocess.TimeoutExpired):
+        # Check if pdflatex is available (memoized PATH lookup, no subprocess)
+        if not _pdflatex_available():
             raise RuntimeError(
                 "pdflatex not found. Please install a LaTeX distribution:\n"
                 "  - Windows: Install MiKTeX (https://miktex.org/)\n"
@@ -260,39 +465,78 @@ require("lua/parser.lua")
         
         # Determine shell parameter based on OS
         shell_param = platform.system() == "Windows"
-        
+
+        # Precompile the preamble into a .fmt file so both passes skip
+        # preamble parsing (the bulk of compile time for a short resume)
+        fmt_name = self._get_preamble_format(tex_path)
+        base_cmd = ["pdflatex", "-interaction=nonstopmode"]
+        if fmt_name:
+            base_cmd.append(f"-fmt={fmt_name}")
+
+        # Documents with cross-references need two passes; ones without
+        # (the default resume template) compile correctly in a single pass
+        two_pass = self._has_cross_references(tex_path)
+
+        # The web UI reuses one .tex filename per session, so a PDF left
+        # over from an earlier compile would pass the exists() check below
+        # even when this run fails — and get cached under this document's
+        # hash. Remove it so success reflects this compile only
+        pdf_path.unlink(missing_ok=True)
+
         try:
             # Run pdflatex (may need to run twice for references/cross-references)
             print(f"   Compiling LaTeX to PDF (this may take a moment)...")
-            
-            # First compilation
+
+            # First compilation. When a second pass will follow, -draftmode
+            # skips font embedding, image processing, and PDF writeout — the
+            # first pass only needs to produce the .aux files
+            first_cmd = base_cmd + (["-draftmode"] if two_pass else []) + [tex_filename]
             result1 = subprocess.run(
-                ["pdflatex", "-interaction=nonstopmode", tex_filename],
+                first_cmd,
                 cwd=work_dir,
                 shell=shell_param,
                 capture_output=True,
                 text=True,
                 timeout=60
             )
-            
-            # Second compilation (for proper cross-references, table of contents, etc.)
-            result2 = subprocess.run(
-                ["pdflatex", "-interaction=nonstopmode", tex_filename],
-                cwd=work_dir,
-                shell=shell_param,
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-            
+
+            # Second compilation (full output) only when cross-references need it
+            if two_pass:
+                result2 = subprocess.run(
+                    base_cmd + [tex_filename],
+                    cwd=work_dir,
+                    shell=shell_param,
+                    capture_output=True,
+                    text=True,
+                    timeout=60
+                )
+                # Rare case: labels still unstable after two passes
+                if self._log_requests_rerun(tex_path):
+                    result2 = subprocess.run(
+                        base_cmd + [tex_filename],
+                        cwd=work_dir,
+                        shell=shell_param,
+                        capture_output=True,
+                        text=True,
+                        timeout=60
+                    )
+            else:
+                result2 = result1
+
+
             # Check if PDF was created
-            pdf_path = work_dir / f"{tex_path.stem}.pdf"
-            
             if pdf_path.exists():
+                # Populate the cache for future identical compiles
+                try:
+                    shutil.copy(pdf_path, cached_pdf)
+                    self._prune_pdf_cache()
+                except OSError:
+                    pass  # cache write failure shouldn't fail the compile
+
                 # Cleanup intermediate files if requested
                 if cleanup:
                     self._cleanup_intermediate_files(tex_path)
-                
+
                 return True, pdf_path
             else:
                 # PDF not created, show error
@@ -305,6 +549,141 @@ require("lua/parser.lua")
         except Exception as e:
             raise RuntimeError(f"Error during PDF compilation: {str(e)}")
     
+    def _prune_pdf_cache(self):
+        """Drop the oldest cached PDFs beyond the entry bound (best-effort)."""
+        try:
+            cached = sorted(self.pdf_cache_dir.glob("*.pdf"),
+                            key=lambda p: p.stat().st_mtime)
+            for stale in cached[:-_PDF_CACHE_MAX_ENTRIES]:
+                stale.unlink(missing_ok=True)
+        except OSError:
+            pass  # pruning is housekeeping, never worth failing a compile
+
+    def _has_cross_references(self, tex_path: Path) -> bool:
+        """
+        Check whether the document uses commands that need a second pass
+
+        Args:
+            tex_path: Path to the .tex file being compiled
+
+        Returns:
+            True if cross-referencing commands are present (or the file
+            cannot be read); False when one pass is sufficient
+        """
+        try:
+            content = tex_path.read_text(encoding='utf-8')
+        except Exception:
+            return True  # can't tell — keep the safe two-pass behavior
+
+        return bool(_XREF_PATTERN.search(content))
+
+    def _log_requests_rerun(self, tex_path: Path) -> bool:
+        """
+        Check the latest .log for pdflatex's rerun hints
+
+        Args:
+            tex_path: Path to the .tex file that was just compiled
+
+        Returns:
+            True if pdflatex reported that another pass is needed
+        """
+        log_path = tex_path.parent / f"{tex_path.stem}.log"
+        try:
+            log_text = log_path.read_text(encoding='utf-8', errors='replace')
+        except Exception:
+            return False
+
+        return any(hint in log_text for hint in _RERUN_HINTS)
+
+    def _get_preamble_format(self, tex_path: Path) -> Optional[str]:
+        """
+        Precompile the document preamble into a pdflatex .fmt file
+
+        The format is cached under ~/.cache/resume_tailor keyed by a hash
+        of the preamble, so documents sharing a preamble (the common case —
+        every resume uses the same template) pay preamble parsing once
+        instead of on every pass. Uses mylatexformat; returns None (plain
+        compilation) if it isn't available.
+
+        Args:
+            tex_path: Path to the .tex file being compiled
+
+        Returns:
+            Format name (without extension) usable via -fmt, or None
+        """
+        try:
+            content = tex_path.read_text(encoding='utf-8')
+        except Exception:
+            return None
+
+        marker = r'\begin{document}'
+        if marker not in content:
+            return None
+
+        preamble = content.split(marker, 1)[0]
+        key = hashlib.blake2b(preamble.encode('utf-8'), digest_size=8).hexdigest()
+        fmt_name = f"resume-preamble-{key}"
+        fmt_path = tex_path.parent / f"{fmt_name}.fmt"
+
+        if fmt_path.exists():
+            return fmt_name
+
+        # Negative memo: when mylatexformat isn't installed the probe costs
+        # a full pdflatex -ini run, so a failure is remembered in-process
+        # and as a sentinel file — otherwise every compile would pay it
+        if fmt_name in _failed_formats:
+            return None
+
+        cached_fmt = _FMT_CACHE_DIR / f"{fmt_name}.fmt"
+        if not cached_fmt.exists():
+            failure_marker = _FMT_CACHE_DIR / f"{fmt_name}.failed"
+            if failure_marker.exists():
+                _failed_formats.add(fmt_name)
+                return None
+
+            preamble_file = _FMT_CACHE_DIR / f"{fmt_name}.preamble.tex"
+            try:
+                _FMT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                with open(preamble_file, 'w', encoding='utf-8') as f:
+                    f.write(preamble)
+
+                result = subprocess.run(
+                    [
+                        "pdflatex", "-ini", "-interaction=nonstopmode",
+                        f"-jobname={fmt_name}",
+                        "&pdflatex", "mylatexformat.ltx", preamble_file.name,
+                    ],
+                    cwd=_FMT_CACHE_DIR,
+                    capture_output=True,
+                    text=True,
+                    timeout=60
+                )
+
+                if result.returncode != 0 or not cached_fmt.exists():
+                    # mylatexformat not installed; compile normally from
+                    # here on without re-probing
+                    _failed_formats.add(fmt_name)
+                    failure_marker.touch()
+                    return None
+            except (FileNotFoundError, subprocess.TimeoutExpired, OSError):
+                _failed_formats.add(fmt_name)
+                try:
+                    failure_marker.touch()
+                except OSError:
+                    pass
+                return None
+            finally:
+                preamble_file.unlink(missing_ok=True)
+                (_FMT_CACHE_DIR / f"{fmt_name}.log").unlink(missing_ok=True)
+
+        # pdflatex looks for the .fmt next to the document being compiled
+        try:
+            shutil.copy(cached_fmt, fmt_path)
+        except OSError:
+            return None
+
+        return fmt_name
+
     def _cleanup_intermediate_files(self, tex_path: Path):
         """
         Delete intermediate LaTeX compilation files
@@ -314,15 +693,13 @@ require("lua/parser.lua")
         """
         work_dir = tex_path.parent
         base_name = tex_path.stem
-        
-        # List of intermediate file extensions to delete
-        intermediate_extensions = ['.log', '.aux', '.out', '.synctex.gz', '.fdb_latexmk', '.fls']
-        
-        for ext in intermediate_extensions:
-            intermediate_file = work_dir / f"{base_name}{ext}"
-            if intermediate_file.exists():
+
+        # One glob pass instead of a stat+unlink per known extension; the
+        # suffix set also catches turds from future template changes
+        for intermediate_file in work_dir.glob(f"{base_name}.*"):
+            if intermediate_file.suffix in _INTERMEDIATE_SUFFIXES or intermediate_file.name.endswith('.synctex.gz'):
                 try:
-                    intermediate_file.unlink()
-                except Exception:
+                    intermediate_file.unlink(missing_ok=True)
+                except OSError:
                     pass  # Ignore errors during cleanup
 
@@ -3,10 +3,345 @@ LLM Service Module
 Handles API calls to OpenAI, Google Gemini, or Groq for resume transformation
 """
 
+import asyncio
+import hashlib
+import io
 import os
-from typing import Optional, List, Dict
-from openai import OpenAI
-import google.generativeai as genai
+import re
+import string
+import time
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Optional, List, Dict
+
+# Retries for transient provider errors (429s, connection drops, 5xx).
+# Optional like the other accelerators: without tenacity the calls simply
+# run unretried, as before
+try:
+    import tenacity
+    _TENACITY_AVAILABLE = True
+except ImportError:
+    _TENACITY_AVAILABLE = False
+
+# Token counting for pre-flight budget checks. Without tiktoken the
+# requests go out unchecked, exactly as before
+try:
+    import tiktoken
+    _TIKTOKEN_AVAILABLE = True
+except ImportError:
+    _TIKTOKEN_AVAILABLE = False
+
+# The provider SDKs are imported lazily in __init__: each one pulls in a
+# heavy dependency tree (pydantic/httpx for OpenAI, grpc for Gemini) and
+# only the selected provider's SDK is ever needed
+
+# orjson serializes/parses roughly 3-5x faster than the stdlib — worth it
+# for the dense, escape-heavy payloads this module hashes and persists —
+# but it stays optional so the app runs without it
+try:
+    import orjson
+
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+
+    def _json_loads(data):
+        return orjson.loads(data)
+except ImportError:
+    import json
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, sort_keys=True).encode("utf-8")
+
+    def _json_loads(data):
+        return json.loads(data)
+
+# Escaping runs in C via str.translate instead of being delegated to the
+# LLM (fewer prompt/output tokens and deterministic results). The table
+# lives with the deterministic renderer so the two paths cannot drift
+from latex_generator import _escape_latex
+
+
+# Static portion of the Stage-1 system prompt. Kept at module level (and at
+# the front of every request) so the prompt prefix is byte-identical across
+# calls — OpenAI/Groq prefix caching bills repeated prefixes at a fraction
+# of the cost and skips re-processing them.
+# Response cache location, in-process LRU bound, and on-disk entry TTL.
+# Set LLM_CACHE=0 to disable caching (e.g. when sampling prompt variants).
+_CACHE_DIR = Path.home() / ".cache" / "resume_tailor"
+_CACHE_MAX_ENTRIES = 128
+_CACHE_TTL_SECONDS = 7 * 86400
+_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+
+# Semantic (embedding-based) cache for Stage 1: opt-in via SEMANTIC_CACHE=1
+# because it pulls in sentence-transformers + FAISS. Not used above this
+# sampling temperature — high-temperature outputs aren't reusable.
+_SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE", "0") == "1"
+_SEMANTIC_CACHE_MAX_TEMPERATURE = 0.7
+_semantic_cache = None
+
+# Process-wide cap on async requests in flight, shared by every LLMService
+# instance so concurrent batch jobs collectively stay under the provider's
+# rate limits instead of self-DoSing. One semaphore per event loop: a
+# contended semaphore binds to its loop, and each asyncio.run (every UI
+# transform click) starts a fresh loop — a single process-wide instance
+# would raise "bound to a different event loop" on the second run. Keyed
+# weakly so finished loops don't pin their gates in memory
+_MAX_CONCURRENT_REQUESTS = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+_async_request_gates: "weakref.WeakKeyDictionary" = None  # initialized below
+
+# Context windows per model, for clamping max_tokens before a request is
+# sent — an overflow otherwise costs a full failed round trip
+_CONTEXT_WINDOWS = {
+    "gpt-4.1-2025-04-14": 1_047_576,
+    "llama-3.1-8b-instant": 131_072,
+    "gemini-2.5-pro": 1_048_576,
+}
+_DEFAULT_CONTEXT_WINDOW = 128_000
+
+# Headroom reserved for message framing overhead and a useful completion
+_COMPLETION_MARGIN = 256
+
+# Ceilings for the variable prompt inputs: latency and cost scale with
+# input tokens, and material past these sizes is noise (boilerplate,
+# duplicated whitespace) rather than signal
+_MAX_RESUME_TOKENS = 4000
+_MAX_JD_TOKENS = 2000
+
+
+def _get_async_gate() -> asyncio.Semaphore:
+    """Lazily create the shared async request semaphore for this loop."""
+    global _async_request_gates
+    if _async_request_gates is None:
+        _async_request_gates = weakref.WeakKeyDictionary()
+    loop = asyncio.get_running_loop()
+    gate = _async_request_gates.get(loop)
+    if gate is None:
+        gate = asyncio.Semaphore(_MAX_CONCURRENT_REQUESTS)
+        _async_request_gates[loop] = gate
+    return gate
+
+
+# One (sync, async) client pair per (provider, base_url, api_key): the
+# SDK's default httpx pool holds only 10 keepalive connections, so every
+# new LLMService instance — and much concurrent traffic — paid 50-150 ms
+# of fresh TLS handshakes. A shared pool with generous limits keeps
+# connections warm across instances and requests. Being module-level,
+# the memo also survives Streamlit reruns: even a freshly constructed
+# LLMService in a rerun picks up the existing warm pool
+_clients: Dict[tuple, tuple] = {}
+
+
+def _get_client_pair(provider: str, api_key: str, base_url: Optional[str] = None):
+    """Memoized (OpenAI, AsyncOpenAI) pair backed by a tuned httpx pool."""
+    cache_key = (provider, base_url, api_key)
+    pair = _clients.get(cache_key)
+    if pair is None:
+        import importlib.util
+
+        import httpx
+        from openai import OpenAI, AsyncOpenAI
+
+        limits = httpx.Limits(max_keepalive_connections=64, max_connections=128,
+                              keepalive_expiry=300)
+        timeout = httpx.Timeout(120.0, connect=10.0)
+        # HTTP/2 multiplexes parallel requests over one connection, but
+        # needs the optional h2 package
+        http2 = importlib.util.find_spec("h2") is not None
+
+        kwargs = {"api_key": api_key}
+        if base_url:
+            kwargs["base_url"] = base_url
+        pair = (
+            OpenAI(http_client=httpx.Client(limits=limits, timeout=timeout, http2=http2),
+                   **kwargs),
+            AsyncOpenAI(http_client=httpx.AsyncClient(limits=limits, timeout=timeout,
+                                                      http2=http2),
+                        **kwargs),
+        )
+        _clients[cache_key] = pair
+    return pair
+
+
+def _get_semantic_cache():
+    """Lazily construct the process-wide semantic cache (or None)."""
+    global _semantic_cache
+    if not _SEMANTIC_CACHE_ENABLED:
+        return None
+    if _semantic_cache is None:
+        import semantic_cache
+        if not semantic_cache.available():
+            return None
+        _semantic_cache = semantic_cache.SemanticCache()
+    return _semantic_cache
+
+_SYSTEM_PROMPT = (
+    "You are an expert resume writer specializing in ATS-optimized, storytelling resumes. "
+    "You ALWAYS provide complete, professional resumes with ALL experiences included - never samples, "
+    "never partial content. Every resume you create is ready for real job applications."
+)
+
+_TRANSFORM_RULES = """Your task is to completely transform the resume to perfectly match the job description while maintaining authenticity and professionalism.
+
+CRITICAL REQUIREMENTS - READ CAREFULLY:
+
+STEP 1: COMPREHENSIVE ANALYSIS
+- Extract ALL companies, roles, and positions from the original resume
+- Identify the unique storyline and achievements for EACH company/role
+- Map each experience to relevant job description requirements
+- Note all technical skills, projects, and accomplishments mentioned
+
+STEP 2: COMPLETE TRANSFORMATION (NOT SAMPLES)
+- Transform EVERY single company/role experience - do not skip any
+- For EACH position, create 4-6 detailed bullet points (not just 2-3)
+- Ensure ALL sections are complete: Experience, Projects, Skills, Education
+- Include ALL original companies and roles - nothing should be omitted
+
+STEP 3: CONTENT QUALITY GUIDELINES
+- Tone: Professional but friendly, confident but not arrogant
+- Accuracy: Maintain all factual information (company names, dates, titles, locations)
+- Quantification: Include specific numbers, metrics, percentages, and results where possible
+- Relevance: Highlight experiences that directly align with job requirements
+- Consistency: Use consistent formatting and verb tense (past tense for past roles)
+- Authenticity: Do NOT over-exaggerate or fabricate achievements - stay truthful to the original
+
+STEP 4: STRUCTURE REQUIREMENTS
+- Professional Experience: List ALL roles with company, title, dates, and location
+  * Each role must have 4-6 bullet points describing achievements
+  * Focus on impact, results, and skills relevant to the job description
+  * Use action verbs (Led, Built, Implemented, Optimized, etc.)
+  * Bullet formatting rules:
+    - The first bullet must summarize the overall scope and impact (team size, domain, tools, outcomes)
+    - Each bullet must be a single concise line that fits on an A4 sheet at 12pt font
+    - Use simple bullet markers (e.g., "- ") with no bolding or additional headings
+- Technical Projects: Include ALL projects with detailed descriptions (3-4 bullet points each)
+- Technical Skills: Comprehensive list matching job requirements (grouped by category)
+- Education: Complete education section with degrees, institutions, dates, GPA if mentioned
+
+OUTPUT FORMAT:
+- Header with name, contact info, location, email, LinkedIn, GitHub
+- Use \"### PROFESSIONAL EXPERIENCE\" for experience
+- Use \"### TECHNICAL PROJECTS\" for projects
+- Use \"### TECHNICAL SKILLS\" for skills (format like):
+
+### TECHNICAL SKILLS
+
+**Category 1:** skill1, skill2, skill3  
+**Category 2:** skill4, skill5, skill6  
+
+- Use \"### EDUCATION\" for education
+
+IMPORTANT: This must be a COMPLETE, PROFESSIONAL resume ready for job applications - not a sample or partial version.
+
+REASONING PROCESS - FOLLOW THESE STEPS:
+1. First, mentally extract ALL companies and roles from the resume - list them all
+2. For each role, identify 4-6 key achievements that match the job description
+3. Transform each bullet point to highlight relevant skills and results
+4. Ensure consistent professional tone throughout - friendly but not over-exaggerated
+5. Verify ALL sections are complete before finalizing - check that nothing is missing
+
+CRITICAL REMINDER: This is a REAL resume for a REAL job application. It must be complete, professional, detailed, and authentic."""
+
+# Static portion of the Stage-2 (LaTeX formatting) prompt, kept at module
+# level for the same prefix-caching reason as the Stage-1 constants
+_LATEX_SYSTEM_PROMPT = (
+    "You are a LaTeX formatting expert specializing in resume documents. "
+    "Format the complete resume content into proper LaTeX structure."
+)
+
+_LATEX_RULES = """You are a LaTeX expert. Format the resume content provided by the user into the provided LaTeX section skeleton.
+
+INSTRUCTIONS:
+1. Extract all information from the transformed resume content
+2. Properly format it into the section skeleton structure
+3. Use appropriate LaTeX commands for sections, subsections, bold text, lists, etc.
+4. Special LaTeX characters in the content are already escaped - do NOT escape them again
+5. Maintain professional formatting and readability
+6. Keep the skeleton structure intact, only filling in the content
+7. Use proper LaTeX list environments (itemize, enumerate) for bullet points
+8. Format dates, names, and contact information appropriately
+9. Return ONLY the document body - the preamble, \\begin{document} and \\end{document} are added locally"""
+
+# Assembled once: concatenating the prompt halves and building the system
+# message dict on every call re-allocated ~10 KB of strings per request.
+# The message dicts are shared constants — callers never mutate message
+# dicts in place (conversation growth appends new dicts to fresh lists)
+_SYSTEM_MESSAGE = {"role": "system", "content": _SYSTEM_PROMPT + "\n\n" + _TRANSFORM_RULES}
+_LATEX_SYSTEM_MESSAGE = {"role": "system", "content": _LATEX_SYSTEM_PROMPT + "\n\n" + _LATEX_RULES}
+
+# User-turn templates, precompiled so per-call construction is a single
+# substitute() instead of repeated f-string concatenation
+_USER_PROMPT_TMPL = string.Template(
+    "JOB DESCRIPTION:\n$job_description\n\n"
+    "ORIGINAL RESUME:\n$resume_text"
+)
+_LATEX_USER_PROMPT_TMPL = string.Template(
+    "LATEX SECTION SKELETON:\n$latex_skeleton\n\n"
+    "TRANSFORMED RESUME CONTENT:\n$transformed_content\n\n"
+    "Return the filled-in document body only."
+)
+
+
+def _split_template(latex_template: str):
+    """
+    Split a full LaTeX template into (preamble, body skeleton, postamble)
+
+    The preamble and document-close boilerplate are identical across every
+    request and carry zero information for the fill-in task, so only the
+    body between \\begin{document} and \\end{document} goes to the LLM —
+    50-70% fewer Stage-2 prompt tokens — and the shell is re-attached
+    locally.
+    """
+    begin = latex_template.find(r"\begin{document}")
+    end = latex_template.find(r"\end{document}")
+    if begin == -1 or end == -1:
+        return "", latex_template, ""
+
+    body_start = begin + len(r"\begin{document}")
+    preamble = latex_template[:body_start] + "\n"
+    skeleton = latex_template[body_start:end].strip()
+    postamble = "\n" + latex_template[end:]
+    return preamble, skeleton, postamble
+
+# Rules for per-section formatting in the pipelined path: the model sees one
+# resume section at a time and returns only its LaTeX body fragment — the
+# document shell is assembled locally
+_LATEX_SECTION_RULES = """You are a LaTeX expert. Format ONE section of a resume into LaTeX body markup.
+
+INSTRUCTIONS:
+1. Format only the section provided - do NOT add a preamble, \\documentclass, \\begin{document} or \\end{document}
+2. If the section has a "### TITLE" header, render it with \\section{Title}; a header/contact block gets centered \\textbf{name} and contact lines instead
+3. Use proper LaTeX list environments (itemize) for bullet points
+4. Special LaTeX characters in the content are already escaped - do NOT escape them again
+5. Return ONLY the LaTeX fragment for this section, nothing else"""
+
+_LATEX_SECTION_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": _LATEX_SYSTEM_PROMPT + "\n\n" + _LATEX_SECTION_RULES,
+}
+
+
+# Stage-1 sections are delimited by "### " headers at the start of a line;
+# a section is complete once the next header (or end of stream) arrives
+def _split_complete_sections(pending: str):
+    """
+    Split accumulated Stage-1 text into complete sections and a remainder
+
+    Args:
+        pending: Streamed text accumulated so far
+
+    Returns:
+        Tuple of (list of complete section texts, unfinished remainder)
+    """
+    sections = []
+    while True:
+        idx = pending.find("\n### ", 1)
+        if idx == -1:
+            return sections, pending
+        section = pending[:idx].strip()
+        if section:
+            sections.append(section)
+        pending = pending[idx + 1:]
 
 
 class LLMService:
@@ -21,53 +356,163 @@ class LLMService:
             api_key: API key for the provider (if None, reads from environment)
         """
         self.provider = provider.lower()
-        
+        retry_exceptions = ()
+
         if self.provider == "openai":
+            from openai import RateLimitError, APIConnectionError, InternalServerError
+
             self.api_key = api_key or os.getenv("OPENAI_API_KEY")
             if not self.api_key:
                 raise ValueError("OpenAI API key not provided. Set OPENAI_API_KEY environment variable.")
-            self.client = OpenAI(api_key=self.api_key)
+            self.client, self.aclient = _get_client_pair(self.provider, self.api_key)
             self.model = "gpt-4.1-2025-04-14"  # Using GPT-4.1 for best quality
-        
+            retry_exceptions = (RateLimitError, APIConnectionError, InternalServerError)
+
         elif self.provider == "gemini":
+            import google.generativeai as genai
+
             self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
             if not self.api_key:
                 raise ValueError("Google API key not provided. Set GOOGLE_API_KEY environment variable.")
             genai.configure(api_key=self.api_key)
             # Use gemini-2.5-pro for best quality
             self.model = genai.GenerativeModel("gemini-2.5-pro")
-        
+            try:
+                from google.api_core import exceptions as gexc
+                retry_exceptions = (gexc.ResourceExhausted, gexc.ServiceUnavailable,
+                                    gexc.InternalServerError, gexc.DeadlineExceeded)
+            except ImportError:
+                retry_exceptions = ()
+
         elif self.provider == "groq":
+            from openai import RateLimitError, APIConnectionError, InternalServerError
+
             self.api_key = api_key or os.getenv("GROQ_API_KEY")
             if not self.api_key:
                 raise ValueError("Groq API key not provided. Set GROQ_API_KEY environment variable.")
             # Groq uses OpenAI-compatible API
-            self.client = OpenAI(
-                api_key=self.api_key,
+            self.client, self.aclient = _get_client_pair(
+                self.provider, self.api_key,
                 base_url="https://api.groq.com/openai/v1"
             )
             # Using meta-llama/llama-guard-4-12b as requested
             # Note: This is a guard model optimized for safety/content moderation
             # For general text generation, consider: llama-3.1-8b-instant or llama-3.3-70b-versatile
             self.model = "llama-3.1-8b-instant"
-        
+            retry_exceptions = (RateLimitError, APIConnectionError, InternalServerError)
+
         else:
             raise ValueError(f"Unsupported provider: {provider}. Use 'openai', 'gemini', or 'groq'")
+
+        # Tokenizer for pre-flight budget checks; cl100k_base approximates
+        # well enough for the non-OpenAI models
+        self._enc = None
+        if _TIKTOKEN_AVAILABLE:
+            try:
+                self._enc = tiktoken.encoding_for_model(self._model_id())
+            except (KeyError, ValueError):
+                self._enc = tiktoken.get_encoding("cl100k_base")
+
+        # Retry policy bound to the selected SDK's transient exception
+        # types; a lone 429/5xx no longer kills a 30-60 s pipeline run.
+        # Randomized waits decorrelate the per-section fan-out — without
+        # jitter, N sections rate-limited together retry together and get
+        # limited again. reraise=True surfaces the root exception to
+        # callers instead of a tenacity.RetryError wrapper
+        self._retry_kwargs = None
+        if _TENACITY_AVAILABLE and retry_exceptions:
+            self._retry_kwargs = dict(
+                stop=tenacity.stop_after_attempt(3),
+                wait=tenacity.wait_random_exponential(min=2, max=30),
+                retry=tenacity.retry_if_exception_type(retry_exceptions),
+                reraise=True,
+            )
+
+        # Content-addressed response cache: users iterate on the same
+        # resume/JD pair, so identical requests skip the API entirely.
+        # bypass_cache skips reads only — fresh responses still overwrite
+        # stale entries, so a forced refresh repairs the cache too
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self.bypass_cache = False
+
+        # In-flight async requests by cache key: N concurrent identical
+        # requests share one API call instead of billing N times
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._inflight_lock = asyncio.Lock()
+
+        # Bind the provider backend once; openai and groq share the
+        # OpenAI-compatible path, gemini has its own
+        if self.provider == "gemini":
+            self._chat_backend = self._chat_gemini
+            self._achat_backend = self._achat_gemini
+            self._astream_backend = self._astream_gemini
+        else:
+            self._chat_backend = self._chat_openai
+            self._achat_backend = self._achat_openai
+            self._astream_backend = self._astream_openai
+
+        # Optional unified router: LLM_ROUTER=litellm sends chat traffic
+        # through LiteLLM's single completion API (provider translation,
+        # fallback handling) instead of the per-provider SDK paths. Opt-in
+        # because litellm is a heavy extra dependency; caching, retries,
+        # budgeting and dedup above apply to this backend unchanged
+        self._litellm = None
+        if os.getenv("LLM_ROUTER", "").lower() == "litellm":
+            try:
+                import litellm
+            except ImportError:
+                litellm = None  # stay on the SDK backends
+            if litellm is not None:
+                self._litellm = litellm
+                # _model_id() returns the bare model name (no "models/"
+                # resource prefix), giving the provider/model slug LiteLLM
+                # routes on, e.g. gemini/gemini-2.5-pro
+                self._litellm_model = f"{self.provider}/{self._model_id()}"
+                self._chat_backend = self._chat_litellm
+                self._achat_backend = self._achat_litellm
+                self._astream_backend = self._astream_litellm
     
-    def transform_resume_content(self, resume_text: str, job_description: str) -> str:
+    def transform_resume_content(self, resume_text: str, job_description: str,
+                                 on_chunk: Optional[Callable[[str], None]] = None) -> str:
         """Backward-compatible method that returns only the transformed resume."""
-        response, _ = self.transform_resume_with_history(resume_text, job_description)
+        response, _ = self.transform_resume_with_history(resume_text, job_description,
+                                                         on_chunk=on_chunk)
         return response
 
-    def transform_resume_with_history(self, resume_text: str, job_description: str):
+    def transform_resume_with_history(self, resume_text: str, job_description: str,
+                                      on_chunk: Optional[Callable[[str], None]] = None):
         """
         Transform resume and return conversation history for iterative refinement.
 
+        Args:
+            resume_text: Original resume text
+            job_description: Target job description
+            on_chunk: Optional callback invoked with each streamed text chunk
+                as it arrives (for live progress reporting)
+
         Returns:
             Tuple[str, List[Dict[str, str]]]: (transformed resume, conversation history)
         """
         messages = self._build_initial_conversation(resume_text, job_description)
-        response = self._chat(messages, temperature=0.6, max_tokens=8000)
+        temperature = 0.6
+
+        # Near-duplicate inputs (re-pasted postings, lightly edited resumes)
+        # hit the semantic cache even when the exact-match cache misses.
+        # bypass_cache skips this lookup too — a forced refresh must not be
+        # answered from any cache layer — while store still runs below
+        sem_cache = _get_semantic_cache() if temperature <= _SEMANTIC_CACHE_MAX_TEMPERATURE else None
+        query = f"{resume_text}\n{job_description}"
+        if sem_cache is not None and not self.bypass_cache:
+            cached = sem_cache.lookup(query)
+            if cached is not None:
+                messages.append({"role": "assistant", "content": cached})
+                return cached, messages
+
+        response = self._chat(messages, temperature=temperature, max_tokens=8000,
+                              on_chunk=on_chunk)
+        if sem_cache is not None:
+            sem_cache.store(query, response)
+
         messages.append({"role": "assistant", "content": response})
         return response, messages
 
@@ -75,6 +520,10 @@ class LLMService:
         """
         Apply follow-up feedback to the existing conversation.
 
+        Responses come from the disk cache when the same conversation and
+        feedback recur (the _chat cache key covers the full message list),
+        so UI reruns that repeat a follow-up cost no API call.
+
         Args:
             conversation: Chat message history returned by transform_resume_with_history/refine_with_feedback
             feedback: User feedback text
@@ -89,153 +538,644 @@ class LLMService:
             "ensure every previous company/role/project remains represented with 4-6 bullet points per role, and "
             "return the full updated resume text."
         )
-        messages = [dict(m) for m in conversation]
+        # Message dicts are treated as immutable everywhere downstream, so
+        # a new list suffices — no need to copy every dict per follow-up
+        messages = list(conversation)
+
+        # The latest assistant turn already embodies every earlier
+        # revision, so re-sending the whole transcript only burns TPM
+        # budget and latency. After the first exchange (which still
+        # carries the job description), prune to system + current resume;
+        # each refinement then costs O(1) tokens, not O(followups)
+        if len(messages) > 3:
+            system = messages[0] if messages[0].get("role") == "system" else None
+            last_assistant = next(
+                (m for m in reversed(messages) if m.get("role") == "assistant"), None
+            )
+            if system is not None and last_assistant is not None:
+                messages = [system, last_assistant]
+
         messages.append({"role": "user", "content": follow_up_prompt})
         response = self._chat(messages, temperature=0.6, max_tokens=8000)
         messages.append({"role": "assistant", "content": response})
         return response, messages
 
+    def _compress_context(self, text: str, max_tokens: int) -> str:
+        """
+        Normalize whitespace and bound prompt input to a token budget
+
+        PDF extraction leaves runs of spaces and stacked blank lines that
+        cost tokens without carrying meaning; collapsing them trims
+        typical inputs 20-30%. Line breaks are preserved — they carry the
+        document structure the transform relies on. When a tokenizer is
+        available the text is additionally truncated to max_tokens.
+
+        Args:
+            text: Raw resume or job-description text
+            max_tokens: Token ceiling (ignored without a tokenizer)
+
+        Returns:
+            Compressed text
+        """
+        text = re.sub(r"[ \t]+", " ", text)
+        text = re.sub(r" ?\n ?", "\n", text)
+        text = re.sub(r"\n{3,}", "\n\n", text).strip()
+
+        if self._enc is not None:
+            tokens = self._enc.encode(text)
+            if len(tokens) > max_tokens:
+                text = self._enc.decode(tokens[:max_tokens])
+        return text
+
     def _build_initial_conversation(self, resume_text: str, job_description: str) -> List[Dict[str, str]]:
-        base_prompt = f"""You are an expert resume writer with deep analytical skills. Your task is to completely transform the resume to perfectly match the job description while maintaining authenticity and professionalism.
+        # Static instructions live in the system message and the variable
+        # inputs come last, so the request prefix is identical across calls
+        # and provider-side prompt caching can reuse it
+        dynamic_part = _USER_PROMPT_TMPL.substitute(
+            job_description=self._compress_context(job_description, _MAX_JD_TOKENS),
+            resume_text=self._compress_context(resume_text, _MAX_RESUME_TOKENS),
+        )
 
-JOB DESCRIPTION:
-{job_description}
+        return [
+            _SYSTEM_MESSAGE,
+            {"role": "user", "content": dynamic_part},
+        ]
+    
+    def format_to_latex(self, transformed_content: str, latex_template: str,
+                        on_chunk: Optional[Callable[[str], None]] = None) -> str:
+        """
+        Stage 2: Format transformed content into LaTeX template structure
 
-ORIGINAL RESUME:
-{resume_text}
+        Args:
+            transformed_content: Transformed resume content from Stage 1
+            latex_template: LaTeX template structure
+            on_chunk: Optional callback invoked with each streamed text chunk
 
-CRITICAL REQUIREMENTS - READ CAREFULLY:
+        Returns:
+            Complete LaTeX document with formatted content
+        """
+        preamble, skeleton, postamble = _split_template(latex_template)
+        latex_messages = self._build_latex_conversation(transformed_content, skeleton)
+        # A formatted resume rarely exceeds ~3500 tokens; an oversized
+        # max_tokens ceiling inflates latency and cost on some providers.
+        # The stop sequence ends generation at document close if the model
+        # emits the shell anyway.
+        response = self._chat(latex_messages, temperature=0.3, max_tokens=4000,
+                              stop=["\\end{document}"], on_chunk=on_chunk)
+        return self._assemble_document(preamble, response, postamble)
 
-STEP 1: COMPREHENSIVE ANALYSIS
-- Extract ALL companies, roles, and positions from the original resume
-- Identify the unique storyline and achievements for EACH company/role
-- Map each experience to relevant job description requirements
-- Note all technical skills, projects, and accomplishments mentioned
+    def _build_latex_conversation(self, transformed_content: str, latex_skeleton: str) -> List[Dict[str, str]]:
+        # Escape special characters deterministically up front so the LLM
+        # doesn't have to (and can't get it wrong)
+        transformed_content = _escape_latex(transformed_content)
 
-STEP 2: COMPLETE TRANSFORMATION (NOT SAMPLES)
-- Transform EVERY single company/role experience - do not skip any
-- For EACH position, create 4-6 detailed bullet points (not just 2-3)
-- Ensure ALL sections are complete: Experience, Projects, Skills, Education
-- Include ALL original companies and roles - nothing should be omitted
+        # Static rules in the system message, then the (per-deployment
+        # invariant) skeleton, then the variable content last — the request
+        # prefix stays identical across resumes for provider prefix caching
+        dynamic_part = _LATEX_USER_PROMPT_TMPL.substitute(
+            latex_skeleton=latex_skeleton, transformed_content=transformed_content
+        )
 
-STEP 3: CONTENT QUALITY GUIDELINES
-- Tone: Professional but friendly, confident but not arrogant
-- Accuracy: Maintain all factual information (company names, dates, titles, locations)
-- Quantification: Include specific numbers, metrics, percentages, and results where possible
-- Relevance: Highlight experiences that directly align with job requirements
-- Consistency: Use consistent formatting and verb tense (past tense for past roles)
-- Authenticity: Do NOT over-exaggerate or fabricate achievements - stay truthful to the original
+        return [
+            _LATEX_SYSTEM_MESSAGE,
+            {"role": "user", "content": dynamic_part},
+        ]
 
-STEP 4: STRUCTURE REQUIREMENTS
-- Professional Experience: List ALL roles with company, title, dates, and location
-  * Each role must have 4-6 bullet points describing achievements
-  * Focus on impact, results, and skills relevant to the job description
-  * Use action verbs (Led, Built, Implemented, Optimized, etc.)
-  * Bullet formatting rules:
-    - The first bullet must summarize the overall scope and impact (team size, domain, tools, outcomes)
-    - Each bullet must be a single concise line that fits on an A4 sheet at 12pt font
-    - Use simple bullet markers (e.g., "- ") with no bolding or additional headings
-- Technical Projects: Include ALL projects with detailed descriptions (3-4 bullet points each)
-- Technical Skills: Comprehensive list matching job requirements (grouped by category)
-- Education: Complete education section with degrees, institutions, dates, GPA if mentioned
+    def submit_batch(self, jobs: List[tuple]) -> str:
+        """
+        Submit Stage-1 transforms through OpenAI's Batch API
 
-OUTPUT FORMAT:
-- Header with name, contact info, location, email, LinkedIn, GitHub
-- Use \"### PROFESSIONAL EXPERIENCE\" for experience
-- Use \"### TECHNICAL PROJECTS\" for projects
-- Use \"### TECHNICAL SKILLS\" for skills (format like):
+        Batch requests are billed at half the interactive rate and bypass
+        the interactive RPM cap, which is the right trade for offline bulk
+        flows that can wait minutes instead of seconds.
 
-### TECHNICAL SKILLS
+        Args:
+            jobs: List of (resume_text, job_description) tuples
 
-**Category 1:** skill1, skill2, skill3  
-**Category 2:** skill4, skill5, skill6  
+        Returns:
+            Batch id to poll with wait_for_batch
+        """
+        if self.provider != "openai":
+            raise ValueError("Batch processing is only available for the openai provider")
 
-- Use \"### EDUCATION\" for education
+        lines = []
+        for index, (resume_text, job_description) in enumerate(jobs):
+            messages = self._build_initial_conversation(resume_text, job_description)
+            lines.append(_json_dumps({
+                "custom_id": f"resume-{index}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model,
+                    "messages": messages,
+                    "temperature": 0.6,
+                    "max_tokens": 8000,
+                },
+            }))
 
-IMPORTANT: This must be a COMPLETE, PROFESSIONAL resume ready for job applications - not a sample or partial version.
+        batch_file = self.client.files.create(
+            file=("batch_input.jsonl", b"\n".join(lines)),
+            purpose="batch",
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        return batch.id
 
-REASONING PROCESS - FOLLOW THESE STEPS:
-1. First, mentally extract ALL companies and roles from the resume - list them all
-2. For each role, identify 4-6 key achievements that match the job description
-3. Transform each bullet point to highlight relevant skills and results
-4. Ensure consistent professional tone throughout - friendly but not over-exaggerated
-5. Verify ALL sections are complete before finalizing - check that nothing is missing
+    def wait_for_batch(self, batch_id: str, poll_interval: int = 30) -> Dict[str, str]:
+        """
+        Poll a batch to completion and collect its responses
 
-CRITICAL REMINDER: This is a REAL resume for a REAL job application. It must be complete, professional, detailed, and authentic."""
+        Args:
+            batch_id: Batch id returned by submit_batch
+            poll_interval: Seconds between status polls
 
-        return [
-            {
-                "role": "system",
-                "content": (
-                    "You are an expert resume writer specializing in ATS-optimized, storytelling resumes. "
-                    "You ALWAYS provide complete, professional resumes with ALL experiences included - never samples, "
-                    "never partial content. Every resume you create is ready for real job applications."
-                ),
-            },
-            {"role": "user", "content": base_prompt},
-        ]
-    
-    def format_to_latex(self, transformed_content: str, latex_template: str) -> str:
+        Returns:
+            Mapping of custom_id ("resume-<index>") to transformed content
         """
-        Stage 2: Format transformed content into LaTeX template structure
-        
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in ("completed", "failed", "expired", "cancelled"):
+                break
+            time.sleep(poll_interval)
+
+        if batch.status != "completed":
+            raise RuntimeError(f"Batch {batch_id} ended with status: {batch.status}")
+
+        raw = self.client.files.content(batch.output_file_id).content
+        results = {}
+        for line in raw.splitlines():
+            if not line.strip():
+                continue
+            record = _json_loads(line)
+            content = record["response"]["body"]["choices"][0]["message"]["content"]
+            results[record["custom_id"]] = content.strip()
+        return results
+
+    async def atransform_resume_content(self, resume_text: str, job_description: str) -> str:
+        """Async variant of transform_resume_content for concurrent pipelines."""
+        response, _ = await self.atransform_resume_with_history(resume_text, job_description)
+        return response
+
+    async def atransform_resume_with_history(self, resume_text: str, job_description: str):
+        """
+        Async variant of transform_resume_with_history.
+
+        Returns:
+            Tuple[str, List[Dict[str, str]]]: (transformed resume, conversation history)
+        """
+        messages = self._build_initial_conversation(resume_text, job_description)
+        response = await self._achat(messages, temperature=0.6, max_tokens=8000)
+        messages.append({"role": "assistant", "content": response})
+        return response, messages
+
+    async def aformat_to_latex(self, transformed_content: str, latex_template: str) -> str:
+        """Async variant of format_to_latex for concurrent pipelines."""
+        preamble, skeleton, postamble = _split_template(latex_template)
+        latex_messages = self._build_latex_conversation(transformed_content, skeleton)
+        response = await self._achat(latex_messages, temperature=0.3, max_tokens=4000,
+                                     stop=["\\end{document}"])
+        return self._assemble_document(preamble, response, postamble)
+
+    async def atransform_streaming(self, resume_text: str, job_description: str,
+                                   on_section: Callable[[str], None],
+                                   on_chunk: Optional[Callable[[str], None]] = None):
+        """
+        Stream the Stage-1 transform, reporting sections as they complete
+
+        Stage 2 only needs complete sections, not the full output — calling
+        on_section as each "### " block closes lets the caller start
+        formatting while Stage 1 is still generating, so the two calls
+        overlap instead of running back to back.
+
         Args:
-            transformed_content: Transformed resume content from Stage 1
-            latex_template: LaTeX template structure
-            
+            resume_text: Original resume text
+            job_description: Target job description
+            on_section: Called with each complete section's text (the
+                header/contact block counts as the first section)
+            on_chunk: Optional callback invoked with each raw streamed
+                text chunk (for live progress display)
+
         Returns:
-            Complete LaTeX document with formatted content
+            Full transformed resume text
         """
-        prompt = f"""You are a LaTeX expert. Format the following resume content into the provided LaTeX template structure.
+        messages = self._build_initial_conversation(resume_text, job_description)
+        key = self._request_key(messages, temperature=0.6, stop=None)
+        cached = self._cache_get(key)
+        if cached is not None:
+            if on_chunk is not None:
+                on_chunk(cached)
+            sections, remainder = _split_complete_sections(cached)
+            for section in sections:
+                on_section(section)
+            if remainder.strip():
+                on_section(remainder.strip())
+            return cached
 
-TRANSFORMED RESUME CONTENT:
-{transformed_content}
+        pieces = []
+        pending = ""
+        async for chunk in self._astream_backend(messages, temperature=0.6, max_tokens=8000):
+            if on_chunk is not None:
+                on_chunk(chunk)
+            pieces.append(chunk)
+            pending += chunk
+            sections, pending = _split_complete_sections(pending)
+            for section in sections:
+                on_section(section)
+        if pending.strip():
+            on_section(pending.strip())
 
-LATEX TEMPLATE STRUCTURE:
-{latex_template}
+        response = "".join(pieces).strip()
+        self._cache_put(key, response)
+        return response
 
-INSTRUCTIONS:
-1. Extract all information from the transformed resume content
-2. Properly format it into the LaTeX template structure
-3. Use appropriate LaTeX commands for sections, subsections, bold text, lists, etc.
-4. Ensure proper escaping of special LaTeX characters (%, &, $, #, _, ^, {{, }})
-5. Maintain professional formatting and readability
-6. Keep the template structure intact, only filling in the content
-7. Use proper LaTeX list environments (itemize, enumerate) for bullet points
-8. Format dates, names, and contact information appropriately
+    async def atransform_and_format(self, resume_text: str, job_description: str,
+                                    max_concurrency: int = 5,
+                                    on_chunk: Optional[Callable[[str], None]] = None):
+        """
+        Overlapped Stage-1 + per-section Stage-2 pipeline
+
+        Stage-2 formatting for each section starts as soon as Stage 1
+        closes it, bounded by a semaphore so a section-heavy resume cannot
+        stampede the provider. Wall time is roughly max(stage1, stage2)
+        instead of their sum.
+
+        Args:
+            resume_text: Original resume text
+            job_description: Target job description
+            max_concurrency: Maximum Stage-2 calls in flight at once
+            on_chunk: Optional callback invoked with each raw streamed
+                Stage-1 text chunk
+
+        Returns:
+            Tuple of (transformed content, conversation history, list of
+            LaTeX section bodies in document order)
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        tasks = []
+
+        async def bounded(section_text):
+            async with semaphore:
+                return await self.aformat_to_latex_section(section_text)
 
-Return the complete LaTeX document ready to compile."""
+        def on_section(section_text):
+            tasks.append(asyncio.create_task(bounded(section_text)))
 
-        latex_messages = [
-            {
-                "role": "system",
-                "content": "You are a LaTeX formatting expert specializing in resume documents. Format the complete resume content into proper LaTeX structure.",
-            },
-            {"role": "user", "content": prompt},
+        transformed = await self.atransform_streaming(resume_text, job_description, on_section,
+                                                      on_chunk=on_chunk)
+        section_bodies = await asyncio.gather(*tasks)
+
+        conversation = self._build_initial_conversation(resume_text, job_description)
+        conversation.append({"role": "assistant", "content": transformed})
+        return transformed, conversation, list(section_bodies)
+
+    async def aformat_to_latex_section(self, section_text: str) -> str:
+        """
+        Stage 2, one section at a time: format a single section to LaTeX
+
+        Args:
+            section_text: One complete Stage-1 section (header block or a
+                "### TITLE" block)
+
+        Returns:
+            LaTeX body fragment for the section (no preamble/postamble)
+        """
+        messages = [
+            _LATEX_SECTION_SYSTEM_MESSAGE,
+            {"role": "user", "content": f"RESUME SECTION:\n{_escape_latex(section_text)}"},
         ]
-        return self._chat(latex_messages, temperature=0.3, max_tokens=8000)
-
-    def _chat(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
-        if self.provider in {"openai", "groq"}:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
+        # A single section is far smaller than the whole document
+        response = await self._achat(messages, temperature=0.3, max_tokens=1500)
+        return response.strip()
+
+    def _model_id(self) -> str:
+        """Stable model identifier for cache keys across providers."""
+        if isinstance(self.model, str):
+            return self.model
+        # The Gemini SDK normalizes names to "models/<id>"; strip the
+        # resource prefix so _CONTEXT_WINDOWS lookups (and anything else
+        # keyed on the bare id) actually match
+        name = getattr(self.model, "model_name", str(self.model))
+        return name.removeprefix("models/")
+
+    def _count_tokens(self, messages: List[Dict[str, str]]) -> int:
+        """Approximate prompt token count (includes per-message framing)."""
+        total = 0
+        for message in messages:
+            total += 4  # role/separator overhead per message
+            total += len(self._enc.encode(message.get("content", "")))
+        return total
+
+    def _budget(self, messages: List[Dict[str, str]], requested_max: int):
+        """
+        Clamp max_tokens to the model's context window, truncating if needed
+
+        Without this an oversized prompt only fails after a full API round
+        trip. When even max_tokens=0 wouldn't fit, the oldest non-system
+        turns are dropped (refine_with_feedback conversations grow without
+        bound otherwise).
+
+        Args:
+            messages: Chat messages about to be sent
+            requested_max: Caller's desired max_tokens
+
+        Returns:
+            Tuple of (possibly truncated messages, clamped max_tokens)
+        """
+        if self._enc is None:
+            return messages, requested_max
+
+        window = _CONTEXT_WINDOWS.get(self._model_id(), _DEFAULT_CONTEXT_WINDOW)
+        available = window - self._count_tokens(messages) - _COMPLETION_MARGIN
+
+        if available < requested_max:
+            messages = list(messages)
+            # Drop the oldest turns between the system prompt and the two
+            # most recent messages until the completion fits
+            while available < _COMPLETION_MARGIN and len(messages) > 3:
+                del messages[1]
+                available = window - self._count_tokens(messages) - _COMPLETION_MARGIN
+
+        return messages, max(min(requested_max, available), _COMPLETION_MARGIN)
+
+    def _request_key(self, messages: List[Dict[str, str]], temperature: float,
+                     stop: Optional[List[str]]) -> str:
+        """Canonical hash of a chat request for exact-match caching."""
+        payload = _json_dumps({
+            "p": self.provider,
+            "m": self._model_id(),
+            "t": temperature,
+            "s": stop,
+            "msgs": messages,
+        })
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        """Look up a cached response in memory, then on disk."""
+        if not _CACHE_ENABLED or getattr(self, "bypass_cache", False):
+            return None
+
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        cache_file = _CACHE_DIR / f"{key}.txt"
+        try:
+            if cache_file.exists():
+                if time.time() - cache_file.stat().st_mtime > _CACHE_TTL_SECONDS:
+                    cache_file.unlink(missing_ok=True)
+                    return None
+                value = cache_file.read_text(encoding="utf-8")
+                self._cache[key] = value
+                return value
+        except OSError:
+            pass  # unreadable cache entries are treated as misses
+        return None
+
+    def _cache_put(self, key: str, value: str):
+        """Store a response in the in-process LRU and persist it to disk."""
+        if not _CACHE_ENABLED:
+            return
+
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        while len(self._cache) > _CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
+
+        try:
+            _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            (_CACHE_DIR / f"{key}.txt").write_text(value, encoding="utf-8")
+        except OSError:
+            pass  # disk persistence is best-effort
+
+    @staticmethod
+    def _ensure_document_close(latex: str) -> str:
+        """Re-append \\end{document} when a stop sequence trimmed it."""
+        if "\\end{document}" not in latex:
+            latex = latex.rstrip() + "\n\\end{document}"
+        return latex
+
+    @classmethod
+    def _assemble_document(cls, preamble: str, body: str, postamble: str) -> str:
+        """Re-attach the locally held template shell around the LLM body."""
+        # Strip any shell the model emitted despite instructions
+        begin = body.find(r"\begin{document}")
+        if begin != -1:
+            body = body[begin + len(r"\begin{document}"):]
+        end = body.find(r"\end{document}")
+        if end != -1:
+            body = body[:end]
+        body = body.strip()
+
+        if not preamble:
+            # Template had no document markers; fall back to the old contract
+            return cls._ensure_document_close(body)
+        return preamble + body + postamble
+
+    def _chat(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+              stop: Optional[List[str]] = None, on_chunk: Optional[Callable[[str], None]] = None) -> str:
+        messages, max_tokens = self._budget(messages, max_tokens)
+        # Exact-match cache on the full request: identical conversations
+        # (dev reruns, retried pipelines, repeated follow-ups) skip the API
+        key = self._request_key(messages, temperature, stop)
+        cached = self._cache_get(key)
+        if cached is not None:
+            if on_chunk is not None:
+                on_chunk(cached)
+            return cached
+
+        if self._retry_kwargs is not None:
+            response = tenacity.Retrying(**self._retry_kwargs)(
+                self._chat_backend, messages, temperature, max_tokens, stop, on_chunk
             )
-            return response.choices[0].message.content.strip()
-        elif self.provider == "gemini":
-            prompt_text = self._messages_to_prompt(messages)
-            response = self.model.generate_content(prompt_text)
-            return response.text.strip()
         else:
-            raise ValueError(f"Unsupported provider: {self.provider}")
+            response = self._chat_backend(messages, temperature, max_tokens, stop, on_chunk)
+        self._cache_put(key, response)
+        return response
+
+    async def _achat(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                     stop: Optional[List[str]] = None) -> str:
+        messages, max_tokens = self._budget(messages, max_tokens)
+        key = self._request_key(messages, temperature, stop)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        # In-flight deduplication: the first caller for a key owns the API
+        # call; concurrent identical requests await the same future and the
+        # provider is billed once
+        async with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = asyncio.get_running_loop().create_future()
+                self._inflight[key] = future
+
+        if not owner:
+            return await asyncio.shield(future)
+
+        try:
+            response = await self._arequest(messages, temperature, max_tokens, stop)
+            self._cache_put(key, response)
+            future.set_result(response)
+            return response
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved in case no one is waiting
+            raise
+        finally:
+            async with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    async def _arequest(self, messages: List[Dict[str, str]], temperature: float,
+                        max_tokens: int, stop: Optional[List[str]]) -> str:
+        # The shared gate keeps concurrent pipelines collectively under the
+        # provider's rate limits; retries re-enter it per attempt
+        if self._retry_kwargs is not None:
+            async for attempt in tenacity.AsyncRetrying(**self._retry_kwargs):
+                with attempt:
+                    async with _get_async_gate():
+                        return await self._achat_backend(messages, temperature, max_tokens, stop)
+        async with _get_async_gate():
+            return await self._achat_backend(messages, temperature, max_tokens, stop)
+
+    # Provider backends. The openai backend also serves groq (OpenAI-
+    # compatible API, different client) — _chat/_achat dispatch through the
+    # method bound once in __init__ instead of re-branching on every call.
+
+    def _chat_openai(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                     stop: Optional[List[str]] = None,
+                     on_chunk: Optional[Callable[[str], None]] = None) -> str:
+        # Stream the completion and collect chunks as they arrive: the first
+        # tokens show up after ~1 s instead of the caller blocking for the
+        # whole multi-thousand-token generation
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stop=stop,
+            stream=True,
+        )
+        pieces = []
+        for chunk in response:
+            if chunk.choices:
+                piece = chunk.choices[0].delta.content or ""
+                pieces.append(piece)
+                if piece and on_chunk is not None:
+                    on_chunk(piece)
+        return "".join(pieces).strip()
+
+    def _chat_gemini(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                     stop: Optional[List[str]] = None,
+                     on_chunk: Optional[Callable[[str], None]] = None) -> str:
+        # Gemini prompts are flattened text; stop sequences are not applied
+        prompt_text = self._messages_to_prompt(messages)
+        response = self.model.generate_content(prompt_text, stream=True)
+        pieces = []
+        for chunk in response:
+            if chunk.text:
+                pieces.append(chunk.text)
+                if on_chunk is not None:
+                    on_chunk(chunk.text)
+        return "".join(pieces).strip()
+
+    async def _achat_openai(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                            stop: Optional[List[str]] = None) -> str:
+        response = await self.aclient.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stop=stop,
+        )
+        return response.choices[0].message.content.strip()
+
+    async def _achat_gemini(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                            stop: Optional[List[str]] = None) -> str:
+        prompt_text = self._messages_to_prompt(messages)
+        response = await self.model.generate_content_async(prompt_text)
+        return response.text.strip()
+
+    async def _astream_openai(self, messages: List[Dict[str, str]], temperature: float,
+                              max_tokens: int, stop: Optional[List[str]] = None):
+        response = await self.aclient.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stop=stop,
+            stream=True,
+        )
+        async for chunk in response:
+            if chunk.choices:
+                piece = chunk.choices[0].delta.content or ""
+                if piece:
+                    yield piece
+
+    async def _astream_gemini(self, messages: List[Dict[str, str]], temperature: float,
+                              max_tokens: int, stop: Optional[List[str]] = None):
+        prompt_text = self._messages_to_prompt(messages)
+        response = await self.model.generate_content_async(prompt_text, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+    # LiteLLM backends (LLM_ROUTER=litellm): one completion API across all
+    # three providers, with LiteLLM handling the provider translation
+
+    def _chat_litellm(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                      stop: Optional[List[str]] = None,
+                      on_chunk: Optional[Callable[[str], None]] = None) -> str:
+        if on_chunk is not None:
+            response = self._litellm.completion(
+                model=self._litellm_model, messages=messages, temperature=temperature,
+                max_tokens=max_tokens, stop=stop, api_key=self.api_key, stream=True,
+            )
+            pieces = []
+            for chunk in response:
+                piece = chunk.choices[0].delta.content or ""
+                if piece:
+                    pieces.append(piece)
+                    on_chunk(piece)
+            return "".join(pieces).strip()
+
+        response = self._litellm.completion(
+            model=self._litellm_model, messages=messages, temperature=temperature,
+            max_tokens=max_tokens, stop=stop, api_key=self.api_key,
+        )
+        return response.choices[0].message.content.strip()
+
+    async def _achat_litellm(self, messages: List[Dict[str, str]], temperature: float,
+                             max_tokens: int, stop: Optional[List[str]] = None) -> str:
+        response = await self._litellm.acompletion(
+            model=self._litellm_model, messages=messages, temperature=temperature,
+            max_tokens=max_tokens, stop=stop, api_key=self.api_key,
+        )
+        return response.choices[0].message.content.strip()
+
+    async def _astream_litellm(self, messages: List[Dict[str, str]], temperature: float,
+                               max_tokens: int, stop: Optional[List[str]] = None):
+        response = await self._litellm.acompletion(
+            model=self._litellm_model, messages=messages, temperature=temperature,
+            max_tokens=max_tokens, stop=stop, api_key=self.api_key, stream=True,
+        )
+        async for chunk in response:
+            piece = chunk.choices[0].delta.content or ""
+            if piece:
+                yield piece
 
     def _messages_to_prompt(self, messages: List[Dict[str, str]]) -> str:
-        formatted = []
+        # StringIO streams the flattened prompt into one buffer instead of
+        # allocating an intermediate string per message before the join —
+        # long follow-up conversations make this a multi-KB saving per call
+        buf = io.StringIO()
         for message in messages:
-            role = message.get("role", "user").upper()
-            content = message.get("content", "")
-            formatted.append(f"{role}: {content}")
-        return "\n\n".join(formatted)
+            buf.write(message.get("role", "user").upper())
+            buf.write(": ")
+            buf.write(message.get("content", ""))
+            buf.write("\n\n")
+        return buf.getvalue().rstrip()
 
@@ -4,6 +4,7 @@ Orchestrates the resume transformation pipeline
 """
 
 import argparse
+import asyncio
 import sys
 from pathlib import Path
 from pdf_extractor import PDFExtractor
@@ -25,17 +26,25 @@ class ResumeUpdater:
         self.pdf_extractor = PDFExtractor()
         self.llm_service = LLMService(provider=llm_provider, api_key=api_key)
         self.latex_generator = LaTeXGenerator()
+
+        # The template never changes between runs, so load it once here
+        # instead of per resume — batch flows reference it repeatedly.
+        # Its token cost needs no separate bookkeeping: the pre-flight
+        # budget counts it as part of the Stage-2 messages
+        self._latex_template = self.latex_generator.get_default_template()
     
-    def process_resume(self, resume_path: str, job_description: str, output_path: str = "updated_resume.tex"):
+    def process_resume(self, resume_path: str, job_description: str, output_path: str = "updated_resume.tex",
+                       use_llm_formatting: bool = False):
         """
         Main processing pipeline
-        
+
         Args:
             resume_path: Path to resume (PDF or text file)
             job_description: Job description text
             output_path: Path to save output LaTeX file
-            compile_pdf: Whether to automatically compile LaTeX to PDF
-            
+            use_llm_formatting: Format via the Stage-2 LLM call instead of
+                the deterministic template renderer (slower, costs tokens)
+
         Returns:
             Tuple of (latex_path, pdf_path) or (latex_path, None) if compilation skipped/failed
         """
@@ -56,25 +65,34 @@ class ResumeUpdater:
         print(f"✅ Extracted {len(resume_text)} characters from resume")
         print()
         
-        # Step 2: Transform resume content (Stage 1 LLM call)
-        print("Step 2/4: Transforming resume content to match job description...")
-        print("   (This may take 30-60 seconds...)")
-        transformed_content = self.llm_service.transform_resume_content(resume_text, job_description)
-        print(f"✅ Resume content transformed ({len(transformed_content)} characters)")
-        print()
-        
-        # Step 3: Get LaTeX template
-        print("Step 3/4: Loading LaTeX template...")
-        latex_template = self.latex_generator.get_default_template()
-        print("✅ LaTeX template loaded")
-        print()
-        
-        # Step 4: Format to LaTeX (Stage 2 LLM call)
-        print("Step 4/4: Formatting content into LaTeX structure...")
-        print("   (This may take 30-60 seconds...)")
-        final_latex = self.llm_service.format_to_latex(transformed_content, latex_template)
-        print("✅ Content formatted into LaTeX")
-        print()
+        if use_llm_formatting:
+            # Steps 2-4 pipelined: Stage-2 formatting fires per section as
+            # Stage 1 streams, so the two LLM calls overlap instead of
+            # running back to back (~max instead of sum of their latencies)
+            print("Step 2/4: Transforming resume content to match job description...")
+            print("Steps 3-4/4: Formatting sections into LaTeX as they stream in...")
+            transformed_content, final_latex = asyncio.run(
+                self._apipeline_transform_format(resume_text, job_description)
+            )
+            print(f"✅ Resume content transformed ({len(transformed_content)} characters)")
+            print("✅ Content formatted into LaTeX")
+            print()
+        else:
+            # Step 2: Transform resume content (Stage 1 LLM call)
+            print("Step 2/4: Transforming resume content to match job description...")
+            transformed_content = self.llm_service.transform_resume_content(
+                resume_text, job_description, on_chunk=self._make_stream_progress()
+            )
+            print(f"\r✅ Resume content transformed ({len(transformed_content)} characters)")
+            print()
+
+            # Steps 3+4: Deterministic render — Stage 1 already emits a
+            # rigid structure, so no second LLM call is needed
+            print("Step 3/4: Parsing transformed content...")
+            print("Step 4/4: Rendering LaTeX structure...")
+            final_latex = self.latex_generator.render_from_transformed(transformed_content)
+            print("✅ Content formatted into LaTeX")
+            print()
         
         # Save LaTeX output
         print(f"Saving LaTeX file to: {output_path}")
@@ -91,6 +109,154 @@ class ResumeUpdater:
         
         return saved_path, None
 
+    async def _apipeline_transform_format(self, resume_text: str, job_description: str):
+        """
+        Run Stage 1 and per-section Stage 2 as an overlapping pipeline
+
+        Delegates to LLMService.atransform_and_format and assembles the
+        returned section fragments into the local document shell.
+
+        Returns:
+            Tuple of (transformed content, complete LaTeX document)
+        """
+        transformed_content, _conversation, section_bodies = (
+            await self.llm_service.atransform_and_format(resume_text, job_description)
+        )
+        final_latex = self.latex_generator.wrap_document("\n\n".join(section_bodies))
+        return transformed_content, final_latex
+
+    @staticmethod
+    def _make_stream_progress():
+        """
+        Build a per-call progress printer fed by streamed LLM chunks
+
+        Streaming makes perceived latency the time to first token instead of
+        the full 30-60 second completion, and the running character count
+        shows the call is alive.
+        """
+        received = [0]
+
+        def on_chunk(chunk):
+            received[0] += len(chunk)
+            print(f"\r   Receiving response... {received[0]} characters", end="", flush=True)
+
+        return on_chunk
+
+    async def aprocess_resume(self, resume_path: str, job_description: str,
+                              output_path: str = "updated_resume.tex",
+                              use_llm_formatting: bool = False):
+        """
+        Async variant of process_resume for concurrent batch flows
+
+        Args:
+            resume_path: Path to resume (PDF or text file)
+            job_description: Job description text
+            output_path: Path to save output LaTeX file
+            use_llm_formatting: Format via the Stage-2 LLM call instead of
+                the deterministic template renderer
+
+        Returns:
+            Tuple of (latex_path, pdf_path) — pdf_path is always None here
+        """
+        resume_path_obj = Path(resume_path)
+
+        if resume_path_obj.suffix.lower() == '.pdf':
+            resume_text = self.pdf_extractor.extract_text(resume_path)
+        else:
+            resume_text = self.pdf_extractor.extract_from_text_file(resume_path)
+
+        transformed_content = await self.llm_service.atransform_resume_content(
+            resume_text, job_description
+        )
+
+        if use_llm_formatting:
+            final_latex = await self.llm_service.aformat_to_latex(transformed_content,
+                                                                  self._latex_template)
+        else:
+            final_latex = self.latex_generator.render_from_transformed(transformed_content)
+
+        saved_path = self.latex_generator.save_latex_output(final_latex, output_path)
+        return saved_path, None
+
+    async def aprocess_many(self, resume_paths, job_description: str,
+                            output_dir: str = ".", max_concurrency: int = 4):
+        """
+        Process multiple resumes against one job description concurrently
+
+        N resumes complete in roughly one LLM round trip instead of N,
+        bounded by a semaphore so the provider's rate limits are respected.
+
+        Args:
+            resume_paths: Iterable of resume file paths
+            job_description: Job description text
+            output_dir: Directory for the generated .tex files
+            max_concurrency: Maximum LLM pipelines in flight at once
+
+        Returns:
+            List of (latex_path, pdf_path) tuples, in input order
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        output_dir = Path(output_dir)
+
+        async def bounded(resume_path):
+            async with semaphore:
+                out_path = output_dir / f"{Path(resume_path).stem}_updated.tex"
+                return await self.aprocess_resume(resume_path, job_description, str(out_path))
+
+        return await asyncio.gather(*[bounded(p) for p in resume_paths])
+
+    def process_many(self, resume_paths, job_description: str, output_dir: str = ".",
+                     batch_threshold: int = 4):
+        """
+        Process multiple resumes, picking the cheapest transport for the size
+
+        Small sets run through the concurrent interactive pipeline; larger
+        OpenAI sets go through the Batch API (half-rate pricing, no
+        interactive RPM cap) since bulk flows can tolerate the added
+        turnaround.
+
+        Args:
+            resume_paths: Iterable of resume file paths
+            job_description: Job description text
+            output_dir: Directory for the generated .tex files
+            batch_threshold: Above this many resumes, use the Batch API
+
+        Returns:
+            List of (latex_path, pdf_path) tuples, in input order
+        """
+        resume_paths = list(resume_paths)
+        if self.llm_service.provider == "openai" and len(resume_paths) > batch_threshold:
+            return self._process_many_batch(resume_paths, job_description, output_dir)
+        return asyncio.run(self.aprocess_many(resume_paths, job_description, output_dir))
+
+    def _process_many_batch(self, resume_paths, job_description: str, output_dir: str):
+        """Bulk path: one Batch API submission for all Stage-1 transforms."""
+        output_dir = Path(output_dir)
+
+        jobs = []
+        for resume_path in resume_paths:
+            if Path(resume_path).suffix.lower() == '.pdf':
+                resume_text = self.pdf_extractor.extract_text(resume_path)
+            else:
+                resume_text = self.pdf_extractor.extract_from_text_file(resume_path)
+            jobs.append((resume_text, job_description))
+
+        batch_id = self.llm_service.submit_batch(jobs)
+        print(f"📦 Submitted batch {batch_id} ({len(jobs)} resumes); polling for completion...")
+        results = self.llm_service.wait_for_batch(batch_id)
+
+        outputs = []
+        for index, resume_path in enumerate(resume_paths):
+            transformed = results.get(f"resume-{index}")
+            if transformed is None:
+                print(f"⚠️  No batch result for {resume_path}; skipping")
+                outputs.append((None, None))
+                continue
+            final_latex = self.latex_generator.render_from_transformed(transformed)
+            out_path = output_dir / f"{Path(resume_path).stem}_updated.tex"
+            outputs.append((self.latex_generator.save_latex_output(final_latex, str(out_path)), None))
+        return outputs
+
 
 def main():
     """Command-line interface"""
@@ -144,6 +310,12 @@ Examples:
         type=str,
         help="API key for LLM provider (or set environment variable)"
     )
+
+    parser.add_argument(
+        "--llm-formatting",
+        action="store_true",
+        help="Format LaTeX via a second LLM call instead of the deterministic renderer (slower)"
+    )
     
     args = parser.parse_args()
     
@@ -152,8 +324,8 @@ Examples:
         if not Path(args.job_file).exists():
             print(f"❌ Error: Job description file not found: {args.job_file}")
             sys.exit(1)
-        with open(args.job_file, 'r', encoding='utf-8') as f:
-            job_description = f.read()
+        # Shares the mmap-backed reader with resume text files
+        job_description = PDFExtractor().extract_from_text_file(args.job_file)
     elif args.job_description:
         job_description = args.job_description
     else:
@@ -169,9 +341,10 @@ Examples:
     try:
         updater = ResumeUpdater(llm_provider=args.provider, api_key=args.api_key)
         updater.process_resume(
-            args.resume, 
-            job_description, 
-            args.output
+            args.resume,
+            job_description,
+            args.output,
+            use_llm_formatting=args.llm_formatting
         )
     except Exception as e:
         print(f"❌ Error: {str(e)}")
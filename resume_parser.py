@@ -0,0 +1,68 @@
+"""
+Resume Parser Module
+Deterministic parser for the Markdown-structured Stage-1 output
+"""
+
+import re
+from typing import Dict, List
+
+# Matches "**Category:** skill1, skill2" lines in the skills section
+_SKILL_LINE_PATTERN = re.compile(r'^\*\*(.+?):?\*\*:?\s*(.+?)\s*$')
+
+
+def parse_transformed(content: str) -> Dict:
+    """
+    Parse Stage-1 output into a structured dict without an LLM
+
+    The Stage-1 prompt mandates a rigid shape — "### SECTION" headers,
+    "- " bullets under entry headings, "**Category:** skills" lines — so a
+    single state-machine pass over the lines recovers the full structure.
+
+    Args:
+        content: Markdown-structured resume text from Stage 1
+
+    Returns:
+        Dict with:
+            header: list of contact-block lines above the first section
+            sections: list of {"title", "entries"} dicts, each entry a
+                {"heading", "bullets"} dict in document order
+            skills: {category: [skill, ...]} from the skills section
+    """
+    header: List[str] = []
+    sections: List[Dict] = []
+    skills: Dict[str, List[str]] = {}
+    section = None
+    entry = None
+
+    for raw_line in content.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        if line.startswith('### '):
+            section = {"title": line[4:].strip(), "entries": []}
+            sections.append(section)
+            entry = None
+            continue
+
+        if section is None:
+            header.append(line.strip('*# '))
+            continue
+
+        if 'SKILL' in section["title"].upper():
+            match = _SKILL_LINE_PATTERN.match(line)
+            if match:
+                category, skill_list = match.group(1), match.group(2)
+                skills[category] = [s.strip() for s in skill_list.split(',') if s.strip()]
+                continue
+
+        if line.startswith(('- ', '* ')):
+            if entry is None:
+                entry = {"heading": "", "bullets": []}
+                section["entries"].append(entry)
+            entry["bullets"].append(line[2:].strip())
+        else:
+            entry = {"heading": line.strip('* '), "bullets": []}
+            section["entries"].append(entry)
+
+    return {"header": header, "sections": sections, "skills": skills}
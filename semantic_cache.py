@@ -0,0 +1,128 @@
+"""
+Semantic Cache Module
+Embedding-based cache for near-duplicate resume/job-description inputs
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+from typing import Optional
+
+# Optional heavy dependencies: the cache silently disables itself when
+# they are not installed so the core pipeline never depends on them
+try:
+    import faiss
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+    _DEPS_AVAILABLE = True
+except ImportError:
+    _DEPS_AVAILABLE = False
+
+# Cosine-similarity threshold for a hit (env-configurable); 0.92 catches
+# copy-pasted job postings and lightly edited resumes without returning
+# results for genuinely different inputs
+_DEFAULT_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+
+_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+
+def available() -> bool:
+    """Whether the optional embedding/FAISS dependencies are installed."""
+    return _DEPS_AVAILABLE
+
+
+class SemanticCache:
+    """
+    Near-duplicate response cache backed by sentence-transformer
+    embeddings and a FAISS inner-product index
+
+    Exact-hash caches miss when two users paste the same job posting with
+    trivial differences; embedding similarity catches those, skipping the
+    Stage-1 LLM call entirely.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, threshold: float = _DEFAULT_THRESHOLD):
+        """
+        Initialize semantic cache
+
+        Args:
+            cache_dir: Directory for the persisted index and responses
+                       (default: ~/.cache/resume_tailor/semantic)
+            threshold: Minimum cosine similarity for a cache hit
+        """
+        if not _DEPS_AVAILABLE:
+            raise RuntimeError(
+                "Semantic cache requires optional dependencies. "
+                "Install them with: pip install sentence-transformers faiss-cpu"
+            )
+
+        self.threshold = threshold
+        self.cache_dir = Path(cache_dir) if cache_dir else Path.home() / ".cache" / "resume_tailor" / "semantic"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._index_path = self.cache_dir / "index.faiss"
+        self._db_path = self.cache_dir / "responses.sqlite3"
+
+        self._encoder = SentenceTransformer(_EMBEDDING_MODEL)
+        dim = self._encoder.get_sentence_embedding_dimension()
+
+        if self._index_path.exists():
+            self._index = faiss.read_index(str(self._index_path))
+        else:
+            self._index = faiss.IndexFlatIP(dim)
+
+        self._db = sqlite3.connect(self._db_path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (vec_id INTEGER PRIMARY KEY, response TEXT NOT NULL)"
+        )
+        self._db.commit()
+
+    def lookup(self, text: str) -> Optional[str]:
+        """
+        Return the cached response for a semantically similar input
+
+        Args:
+            text: Query text (resume + job description)
+
+        Returns:
+            Cached response if the nearest neighbor clears the similarity
+            threshold, otherwise None
+        """
+        if self._index.ntotal == 0:
+            return None
+
+        vec = self._embed(text)
+        scores, ids = self._index.search(vec, 1)
+
+        if scores[0][0] < self.threshold:
+            return None
+
+        row = self._db.execute(
+            "SELECT response FROM responses WHERE vec_id = ?", (int(ids[0][0]),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def store(self, text: str, response: str):
+        """
+        Add an input/response pair to the cache and persist it
+
+        Args:
+            text: Query text that produced the response
+            response: LLM response to cache
+        """
+        vec = self._embed(text)
+        vec_id = self._index.ntotal
+        self._index.add(vec)
+
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses (vec_id, response) VALUES (?, ?)",
+            (vec_id, response),
+        )
+        self._db.commit()
+        faiss.write_index(self._index, str(self._index_path))
+
+    def _embed(self, text: str):
+        """Encode text to a unit-norm vector (inner product == cosine)."""
+        vec = self._encoder.encode([text], convert_to_numpy=True).astype(np.float32)
+        faiss.normalize_L2(vec)
+        return vec
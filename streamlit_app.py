@@ -4,13 +4,20 @@ Provides a user-friendly web interface for resume transformation
 """
 
 import streamlit as st
+import asyncio
+import functools
+import hashlib
 import os
-from pathlib import Path
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Tuple, Optional
-from pdf_extractor import PDFExtractor
-from llm_service import LLMService
-from latex_generator import LaTeXGenerator
+
+# PDFExtractor, LLMService, and LaTeXGenerator are imported inside the
+# handlers that need them: their modules pull in the PDF engines and LLM
+# SDKs, a cold-import cost that would otherwise land on every rerun
+# before the user has even clicked Transform. Repeat imports are O(1)
+# sys.modules hits.
 
 
 # Page configuration
@@ -22,7 +29,7 @@ st.set_page_config(
 )
 
 # Custom CSS for better styling
-st.markdown("""
+_PAGE_CSS = """
     <style>
     .main-header {
         font-size: 2.5rem;
@@ -42,35 +49,86 @@ st.markdown("""
         margin: 1rem 0;
     }
     </style>
-""", unsafe_allow_html=True)
+"""
+
+
+@st.cache_resource(show_spinner=False)
+def _inject_css():
+    """Inject the custom CSS once; Streamlit replays the cached element
+    on later reruns instead of re-executing the markdown call."""
+    st.markdown(_PAGE_CSS, unsafe_allow_html=True)
+
+
+_inject_css()
+
 
+# Input-size guardrail: beyond the hard limit a transform would spend
+# minutes and real money on content that is mostly going to be truncated
+# anyway. Truncation warnings fire at each field's actual pipeline
+# ceiling (llm_service trims the resume and job description separately)
+_HARD_TOKEN_LIMIT = 12_000
 
+
+@st.cache_resource(show_spinner=False)
+def _get_token_encoder():
+    """Shared tiktoken encoder, or None when tiktoken isn't installed."""
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def _count_tokens(text: str) -> int:
+    """Token count of text (~4 chars/token heuristic without tiktoken)."""
+    encoder = _get_token_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text))
+    return len(text) // 4
+
+
+def _hash_api_key(api_key: str) -> str:
+    """Short stable digest of the API key for cache/session keying.
+
+    Keying on a 16-byte blake2b digest instead of the raw key keeps the
+    secret out of cache-key structures and avoids re-hashing a long user
+    string on every rerun lookup.
+    """
+    return hashlib.blake2b(api_key.encode(), digest_size=16).hexdigest()
+
+
+# Known API key prefixes, checked in order ("gsk_" is Groq's common pattern)
+_PROVIDER_PREFIXES = (
+    ("sk-", "OpenAI (GPT-4.1)", "openai"),
+    ("AIza", "Google Gemini (2.5 Pro)", "gemini"),
+    ("gsk_", "Groq (Llama Guard 4)", "groq"),
+)
+
+
+@functools.lru_cache(maxsize=8)
 def detect_api_provider(api_key: str) -> Tuple[Optional[str], Optional[str]]:
     """
     Automatically detect API provider based on key format
-    
+
+    Cached because Streamlit re-runs the whole script on every widget
+    interaction and the answer only changes when the key does. A plain
+    lru_cache beats st.cache_data here: the result is a tiny tuple, so
+    Streamlit's pickling/locking machinery costs more than the lookup it
+    saves, and keeping the raw key out of cache_data's keying is a bonus.
+
     Returns:
         Tuple of (provider_name, provider_code)
     """
     if not api_key:
         return None, None
-    
+
     api_key = api_key.strip()
-    
-    # OpenAI keys start with "sk-"
-    if api_key.startswith("sk-"):
-        return "OpenAI (GPT-4.1)", "openai"
-    
-    # Google API keys start with "AIza"
-    elif api_key.startswith("AIza"):
-        return "Google Gemini (2.5 Pro)", "gemini"
-    
-    # Groq API keys start with "gsk_" (common pattern)
-    elif api_key.startswith("gsk_"):
-        return "Groq (Llama Guard 4)", "groq"
-    
-    # Unknown format
-    return None, None
+    return next(
+        ((name, code) for prefix, name, code in _PROVIDER_PREFIXES
+         if api_key.startswith(prefix)),
+        (None, None)
+    )
 
 
 def initialize_session_state():
@@ -93,27 +151,207 @@ def initialize_session_state():
         st.session_state.processing_followup = False
     if 'transformed_content' not in st.session_state:
         st.session_state.transformed_content = None
+    # Env vars are immutable for the process lifetime; resolve the
+    # default key once instead of three getenv calls per rerun
+    st.session_state.setdefault(
+        'default_api_key',
+        os.getenv("OPENAI_API_KEY") or os.getenv("GOOGLE_API_KEY") or os.getenv("GROQ_API_KEY") or ""
+    )
+
+
+@st.cache_data(show_spinner=False, ttl=24 * 60 * 60, max_entries=32)
+def _extract_upload_cached(file_bytes: bytes, filename: str) -> str:
+    """
+    Extract text from upload content, cached by content across reruns
+
+    Streamlit re-executes the script on every interaction; keying on the
+    raw bytes means each distinct upload is parsed once per session
+    instead of once per rerun. The entry cap and daily TTL keep the
+    server's memory bounded when many distinct files pass through.
+    """
+    extractor = get_pdf_extractor()
+
+    if filename.lower().endswith('.pdf'):
+        # Parse straight from the upload buffer — no temp-file round trip
+        return extractor.extract_from_bytes(file_bytes)
+
+    # Text uploads are already in memory; decode directly instead of
+    # writing a temp file just so the path-based reader can mmap it back
+    return file_bytes.decode('utf-8', errors='replace')
 
 
 def extract_text_from_uploaded_file(uploaded_file):
     """Extract text from uploaded file (PDF or text)"""
-    extractor = PDFExtractor()
-    
-    # Save uploaded file temporarily
-    with tempfile.NamedTemporaryFile(delete=False, suffix=uploaded_file.name) as tmp_file:
-        tmp_file.write(uploaded_file.getvalue())
-        tmp_path = tmp_file.name
-    
-    try:
-        if uploaded_file.name.lower().endswith('.pdf'):
-            text = extractor.extract_text(tmp_path)
+    return _extract_upload_cached(bytes(uploaded_file.getbuffer()), uploaded_file.name)
+
+
+@st.cache_resource
+def get_default_latex_template() -> str:
+    """Default LaTeX template, loaded once per server process."""
+    return get_latex_generator().get_default_template()
+
+
+# Service factories: cache_resource memoizes per process, so the SDK
+# clients, tokenizer, and template I/O are built once and shared across
+# reruns and sessions. The raw key arrives via the underscore-prefixed
+# parameter, which Streamlit excludes from the cache key — only the
+# digest participates in keying.
+
+@st.cache_resource(show_spinner=False)
+def _prewarm_llm_connection(provider: str, api_key_hash: str, _api_key: str):
+    """Open the provider HTTPS connection before the first real call
+
+    The first transform otherwise pays the TCP+TLS handshake (~200-500 ms)
+    before any tokens flow. A daemon thread issues a cheap models.list
+    against the same pooled client the pipeline will use, so by the time
+    the user clicks Transform the connection is already warm. Runs once
+    per (provider, key digest) per process; best-effort by design.
+    """
+    if provider not in ("openai", "groq"):
+        return None
+
+    import threading
+
+    def warm():
+        try:
+            from llm_service import _get_client_pair
+
+            base_url = "https://api.groq.com/openai/v1" if provider == "groq" else None
+            client, _ = _get_client_pair(provider, _api_key, base_url)
+            client.models.list()
+        except Exception:
+            pass  # warming is opportunistic; real calls surface real errors
+
+    thread = threading.Thread(target=warm, daemon=True)
+    thread.start()
+    return thread
+
+
+@st.cache_resource(show_spinner=False)
+def get_llm_service(provider: str, api_key_hash: str, _api_key: str):
+    """One LLMService per (provider, key digest), shared across reruns."""
+    from llm_service import LLMService
+
+    return LLMService(provider=provider, api_key=_api_key)
+
+
+@st.cache_resource(show_spinner=False)
+def get_pdf_extractor():
+    """Process-wide PDFExtractor instance."""
+    from pdf_extractor import PDFExtractor
+
+    return PDFExtractor()
+
+
+@st.cache_resource(show_spinner=False)
+def get_latex_generator():
+    """Process-wide LaTeXGenerator instance."""
+    from latex_generator import LaTeXGenerator
+
+    return LaTeXGenerator()
+
+
+def _get_artifact_dir() -> Path:
+    """Per-session auto-cleaned directory for generated build artifacts
+
+    pdflatex needs real paths, but a fresh mkdtemp per compile leaks a
+    directory each transform. One TemporaryDirectory per session keeps
+    every artifact in one place and removes it when the session's state
+    is garbage-collected. Session-scoped on purpose: a process-wide
+    directory would let concurrent users race on the same filenames and
+    download each other's resumes. Within a session, compiles are
+    serialized by the single-worker executor, so reusing the same
+    filenames is safe.
+    """
+    artifact_dir = st.session_state.get('artifact_dir')
+    if artifact_dir is None:
+        artifact_dir = tempfile.TemporaryDirectory(prefix="resume_tailor_")
+        st.session_state.artifact_dir = artifact_dir
+    return Path(artifact_dir.name)
+
+
+@st.fragment
+def _render_download_section(final_latex: str):
+    """Download section isolated in a fragment
+
+    Clicking a download button triggers a rerun; as a fragment, only this
+    block re-executes instead of the whole script, so the button press
+    can never re-enter the extraction or LLM paths.
+    """
+    st.markdown("### 📥 Download Your Updated Resume")
+
+    col_dl1, col_dl2 = st.columns(2)
+
+    with col_dl1:
+        # LaTeX download
+        st.download_button(
+            label="📝 Download LaTeX (.tex)",
+            data=final_latex,
+            file_name="updated_resume.tex",
+            mime="text/plain",
+            use_container_width=True
+        )
+
+    with col_dl2:
+        future = st.session_state.get('pdf_future')
+        if future is None:
+            st.info("To convert to PDF, run `pdflatex updated_resume.tex` (requires a LaTeX distribution).")
+        elif future.done():
+            # Settle the future's bytes into session state once; later
+            # reruns (every download click is one) serve from memory with
+            # no future poll or disk read. b"" marks a failed compile
+            pdf_bytes = st.session_state.get('pdf_bytes')
+            if pdf_bytes is None:
+                try:
+                    pdf_bytes = future.result() or b""
+                except Exception:
+                    pdf_bytes = b""
+                st.session_state.pdf_bytes = pdf_bytes
+            if pdf_bytes:
+                st.download_button(
+                    label="📄 Download PDF",
+                    data=pdf_bytes,
+                    file_name="updated_resume.pdf",
+                    mime="application/pdf",
+                    use_container_width=True
+                )
+            else:
+                st.info("PDF compilation unavailable here — run `pdflatex updated_resume.tex` locally.")
         else:
-            text = extractor.extract_from_text_file(tmp_path)
-        return text
-    finally:
-        # Clean up temp file
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
+            st.caption("⏳ Compiling PDF in the background...")
+            # Fragment-scoped rerun: re-checks the future without
+            # replaying the rest of the script
+            st.button("🔄 Check PDF status", key="pdf_status_refresh",
+                      use_container_width=True)
+
+
+def _start_pdf_compile(latex_generator, final_latex: str):
+    """Kick off pdflatex in a background thread
+
+    The .tex download is ready the moment the LLM finishes; compilation
+    (3-10 s of CPU) overlaps with the user reading the preview instead of
+    blocking the success message. The single-worker executor lives in
+    session state so repeated transforms reuse one thread.
+    """
+    executor = st.session_state.get('compile_executor')
+    if executor is None:
+        executor = ThreadPoolExecutor(max_workers=1)
+        st.session_state.compile_executor = executor
+
+    # Resolve the session directory on the script thread — session state
+    # is not available from the worker
+    workdir = _get_artifact_dir()
+
+    def _compile() -> Optional[bytes]:
+        tex_path = workdir / "updated_resume.tex"
+        tex_path.write_text(final_latex, encoding="utf-8")
+        success, pdf_path = latex_generator.compile_to_pdf(str(tex_path))
+        if success and pdf_path:
+            return Path(pdf_path).read_bytes()
+        return None
+
+    st.session_state.pdf_bytes = None  # new document invalidates old bytes
+    st.session_state.pdf_future = executor.submit(_compile)
 
 
 def main():
@@ -134,7 +372,7 @@ def main():
         api_key = st.text_input(
             "🔑 API Key",
             type="password",
-            value=os.getenv("OPENAI_API_KEY") or os.getenv("GOOGLE_API_KEY") or os.getenv("GROQ_API_KEY") or "",
+            value=st.session_state.default_api_key,
             help="Enter your API key (OpenAI, Google Gemini, or Groq). The app will auto-detect the provider."
         )
         
@@ -146,6 +384,9 @@ def main():
             st.info(f"✅ Detected: **{detected_provider}**")
             provider = detected_provider_code
             api_provider_display = detected_provider
+            # Open the HTTPS connection now, while the user is still
+            # filling in inputs — the first transform skips the handshake
+            _prewarm_llm_connection(provider, _hash_api_key(api_key), api_key)
         else:
             if api_key:
                 st.warning("⚠️ Could not detect API key type. Please ensure your key is correct.")
@@ -191,6 +432,14 @@ def main():
             - Model: meta-llama/llama-guard-4-12b (ultra-fast!)
             """)
         
+        # Identical requests normally come back from the on-disk response
+        # cache; this regenerates from the API (and refreshes the cache)
+        force_refresh = st.checkbox(
+            "🔄 Force refresh",
+            value=False,
+            help="Bypass cached LLM responses and regenerate from the API"
+        )
+
         st.markdown("---")
         st.markdown("### 📖 Instructions")
         st.markdown("""
@@ -212,7 +461,12 @@ def main():
     
     # Main content area
     col1, col2 = st.columns(2)
-    
+
+    uploaded_resume = None
+    uploaded_jd = None
+    resume_status = None
+    jd_status = None
+
     # Left column - Resume Input
     with col1:
         st.subheader("📄 Your Resume")
@@ -232,25 +486,24 @@ def main():
                 key="resume_upload"
             )
             
-            if uploaded_resume is not None:
-                with st.spinner("Extracting text from resume..."):
-                    try:
-                        st.session_state.resume_text = extract_text_from_uploaded_file(uploaded_resume)
-                        st.success(f"✅ Resume loaded! ({len(st.session_state.resume_text)} characters)")
-                        with st.expander("Preview Resume Text"):
-                            st.text(st.session_state.resume_text[:500] + "..." if len(st.session_state.resume_text) > 500 else st.session_state.resume_text)
-                    except Exception as e:
-                        st.error(f"Error extracting text: {str(e)}")
+            # Extraction happens below, after both uploaders are known, so
+            # the two files can parse concurrently; results render here
+            resume_status = st.container()
         else:
-            resume_text_input = st.text_area(
-                "Paste Resume Content",
-                height=300,
-                placeholder="Paste your resume content here...",
-                key="resume_textarea"
-            )
-            if resume_text_input:
+            # st.form defers the rerun until submit, so pasting or typing
+            # costs one script run instead of one per keystroke
+            with st.form("resume_text_form", clear_on_submit=False):
+                resume_text_input = st.text_area(
+                    "Paste Resume Content",
+                    height=300,
+                    placeholder="Paste your resume content here...",
+                    key="resume_textarea"
+                )
+                resume_submitted = st.form_submit_button("Load Resume")
+            if resume_submitted and resume_text_input:
                 st.session_state.resume_text = resume_text_input
-                st.success(f"✅ Resume loaded! ({len(resume_text_input)} characters)")
+            if st.session_state.resume_text:
+                st.success(f"✅ Resume loaded! ({len(st.session_state.resume_text)} characters)")
     
     # Right column - Job Description Input
     with col2:
@@ -271,26 +524,72 @@ def main():
                 key="jd_upload"
             )
             
-            if uploaded_jd is not None:
-                with st.spinner("Extracting text from job description..."):
-                    try:
-                        st.session_state.job_description = extract_text_from_uploaded_file(uploaded_jd)
-                        st.success(f"✅ Job description loaded! ({len(st.session_state.job_description)} characters)")
-                        with st.expander("Preview Job Description"):
-                            st.text(st.session_state.job_description[:500] + "..." if len(st.session_state.job_description) > 500 else st.session_state.job_description)
-                    except Exception as e:
-                        st.error(f"Error extracting text: {str(e)}")
+            jd_status = st.container()
         else:
-            jd_text_input = st.text_area(
-                "Paste Job Description",
-                height=300,
-                placeholder="Paste the job description here...",
-                key="jd_textarea"
-            )
-            if jd_text_input:
+            with st.form("jd_text_form", clear_on_submit=False):
+                jd_text_input = st.text_area(
+                    "Paste Job Description",
+                    height=300,
+                    placeholder="Paste the job description here...",
+                    key="jd_textarea"
+                )
+                jd_submitted = st.form_submit_button("Load Job Description")
+            if jd_submitted and jd_text_input:
                 st.session_state.job_description = jd_text_input
-                st.success(f"✅ Job description loaded! ({len(jd_text_input)} characters)")
-    
+            if st.session_state.job_description:
+                st.success(f"✅ Job description loaded! ({len(st.session_state.job_description)} characters)")
+
+    # Extract uploads: when both files are present they parse concurrently
+    # (the C-backed PDF engines release the GIL), halving the wait. Same
+    # asyncio model as the LLM pipeline, with extraction pushed to threads.
+    # A per-upload content hash in session state short-circuits reruns
+    # entirely — an unchanged file skips even the cache lookup
+    if uploaded_resume is not None or uploaded_jd is not None:
+        pending = {}
+        if uploaded_resume is not None:
+            resume_hash = hashlib.blake2b(uploaded_resume.getbuffer(), digest_size=16).digest()
+            if st.session_state.get('resume_upload_hash') != resume_hash:
+                pending['resume'] = uploaded_resume
+        if uploaded_jd is not None:
+            jd_hash = hashlib.blake2b(uploaded_jd.getbuffer(), digest_size=16).digest()
+            if st.session_state.get('jd_upload_hash') != jd_hash:
+                pending['jd'] = uploaded_jd
+
+        results = {}
+        if pending:
+            async def _extract_uploads():
+                tasks = {name: asyncio.to_thread(extract_text_from_uploaded_file, upload)
+                         for name, upload in pending.items()}
+                outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+                return dict(zip(tasks.keys(), outcomes))
+
+            with st.spinner("Extracting text from uploads..."):
+                results = asyncio.run(_extract_uploads())
+
+        if uploaded_resume is not None:
+            with resume_status:
+                outcome = results.get('resume', st.session_state.resume_text)
+                if isinstance(outcome, Exception):
+                    st.error(f"Error extracting text: {str(outcome)}")
+                elif outcome is not None:
+                    st.session_state.resume_text = outcome
+                    st.session_state.resume_upload_hash = resume_hash
+                    st.success(f"✅ Resume loaded! ({len(outcome)} characters)")
+                    with st.expander("Preview Resume Text"):
+                        st.text(outcome[:500] + "..." if len(outcome) > 500 else outcome)
+
+        if uploaded_jd is not None:
+            with jd_status:
+                outcome = results.get('jd', st.session_state.job_description)
+                if isinstance(outcome, Exception):
+                    st.error(f"Error extracting text: {str(outcome)}")
+                elif outcome is not None:
+                    st.session_state.job_description = outcome
+                    st.session_state.jd_upload_hash = jd_hash
+                    st.success(f"✅ Job description loaded! ({len(outcome)} characters)")
+                    with st.expander("Preview Job Description"):
+                        st.text(outcome[:500] + "..." if len(outcome) > 500 else outcome)
+
     st.markdown("---")
     
     # Process Button
@@ -317,68 +616,88 @@ def main():
         if not api_key:
             st.error("❌ Please enter your API key in the sidebar!")
             return
-        
+
+        # Size gate: a pasted 50-page document would otherwise head into a
+        # multi-minute, full-price LLM call (and a likely timeout). The
+        # warning thresholds are the pipeline's real per-field ceilings,
+        # so truncation never happens without the user being told
+        from llm_service import _MAX_JD_TOKENS, _MAX_RESUME_TOKENS
+
+        for label, text, ceiling in (
+                ("Resume", st.session_state.resume_text, _MAX_RESUME_TOKENS),
+                ("Job description", st.session_state.job_description, _MAX_JD_TOKENS)):
+            n_tokens = _count_tokens(text)
+            if n_tokens > _HARD_TOKEN_LIMIT:
+                st.error(f"❌ {label} is too long ({n_tokens:,} tokens; limit "
+                         f"{_HARD_TOKEN_LIMIT:,}). Please trim it and try again.")
+                return
+            if n_tokens > ceiling:
+                st.warning(f"⚠️ {label} is long ({n_tokens:,} tokens); only "
+                           f"about the first {ceiling:,} will be used.")
+
         # Start processing
         st.session_state.processing = True
         
         try:
-            # Initialize services
-            pdf_extractor = PDFExtractor()
-            llm_service = LLMService(provider=provider, api_key=api_key)
-            latex_generator = LaTeXGenerator()
-            
-            # Progress tracking
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            # Step 1: Extract text (already done, but show progress)
-            status_text.text("Step 1/4: Resume text extracted ✅")
-            progress_bar.progress(20)
-            
-            # Step 2: Transform resume content
-            status_text.text("Step 2/4: Transforming resume content to match job description... (30-60 seconds)")
-            progress_bar.progress(40)
-            
-            transformed_content, conversation_history = llm_service.transform_resume_with_history(
-                st.session_state.resume_text,
-                st.session_state.job_description
-            )
-            st.session_state.transformed_content = transformed_content
-            st.session_state.conversation = conversation_history
-            st.session_state.followups_used = 0
-            st.session_state.max_followups = 5
-            st.session_state.provider = provider
-            st.session_state.api_key = api_key
-            
-            status_text.text("Step 2/4: Resume content transformed ✅")
-            progress_bar.progress(60)
-            
-            # Step 3: Get LaTeX template
-            status_text.text("Step 3/4: Loading LaTeX template...")
-            progress_bar.progress(70)
-            latex_template = latex_generator.get_default_template()
-            status_text.text("Step 3/4: LaTeX template loaded ✅")
-            progress_bar.progress(80)
-            
-            # Step 4: Format to LaTeX
-            status_text.text("Step 4/4: Formatting content into LaTeX structure... (30-60 seconds)")
-            progress_bar.progress(90)
-            
-            final_latex = llm_service.format_to_latex(transformed_content, latex_template)
-            status_text.text("Step 4/4: Content formatted into LaTeX ✅")
-            progress_bar.progress(95)
-            
-            # Save LaTeX to temporary file
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.tex', delete=False, encoding='utf-8') as tmp_tex:
-                tmp_tex.write(final_latex)
-                tmp_tex_path = tmp_tex.name
-            
-            st.session_state.latex_output = final_latex
-            latex_file_path = Path(tmp_tex_path)
-            
-            progress_bar.progress(100)
-            status_text.text("✨ Transformation Complete!")
+            # The cache_resource factories hand back the same objects on
+            # every rerun, so pooled HTTP clients, tokenizer, and template
+            # survive across clicks
+            llm_service = get_llm_service(provider, _hash_api_key(api_key), api_key)
+            llm_service.bypass_cache = force_refresh
+            latex_generator = get_latex_generator()
             
+            # Steps 2-4 run as one overlapped pipeline: per-section LaTeX
+            # formatting (bounded by a semaphore) starts while Stage 1 is
+            # still streaming, so the two LLM stages overlap. st.status
+            # scopes the progress output so the surrounding page isn't
+            # touched by intermediate updates. Each update is a websocket
+            # round trip to the frontend, so progress stays at these few
+            # milestones — the streamed text itself is the fine-grained
+            # progress indicator
+            with st.status("Transforming your resume...", expanded=True) as status:
+                st.write("Transforming resume content to match the job description...")
+
+                # Stream Stage-1 tokens into a live placeholder: total wall
+                # time is unchanged, but perceived latency drops to the
+                # first token and the user can see the content taking shape
+                stream_placeholder = st.empty()
+                stream_buf = []
+
+                def _render_chunk(chunk: str):
+                    stream_buf.append(chunk)
+                    stream_placeholder.markdown("".join(stream_buf))
+
+                transformed_content, conversation_history, section_bodies = asyncio.run(
+                    llm_service.atransform_and_format(
+                        st.session_state.resume_text,
+                        st.session_state.job_description,
+                        on_chunk=_render_chunk,
+                    )
+                )
+                # The preview expander below shows the final text; drop the
+                # live view so it isn't rendered twice
+                stream_placeholder.empty()
+                st.session_state.transformed_content = transformed_content
+                st.session_state.conversation = conversation_history
+                st.session_state.followups_used = 0
+                st.session_state.max_followups = 5
+                st.session_state.provider = provider
+                st.session_state.api_key = api_key
+
+                st.write("Assembling LaTeX document...")
+                final_latex = latex_generator.wrap_document("\n\n".join(section_bodies))
+
+                # The download button serves the document straight from
+                # memory — no temp file needed
+                st.session_state.latex_output = final_latex
+
+                status.update(label="✨ Transformation Complete!", state="complete",
+                              expanded=False)
+
+            # Compile the PDF in the background while the user reads the
+            # preview; the download fragment picks the result up when done
+            _start_pdf_compile(latex_generator, final_latex)
+
             # Success message
             st.markdown("""
             <div class="success-box">
@@ -387,24 +706,9 @@ def main():
             </div>
             """, unsafe_allow_html=True)
             
-            # Download buttons
-            st.markdown("### 📥 Download Your Updated Resume")
-            
-            col_dl1, col_dl2 = st.columns(2)
-            
-            with col_dl1:
-                # LaTeX download
-                st.download_button(
-                    label="📝 Download LaTeX (.tex)",
-                    data=final_latex,
-                    file_name="updated_resume.tex",
-                    mime="text/plain",
-                    use_container_width=True
-                )
-            
-            with col_dl2:
-                st.info("To convert to PDF, run `pdflatex updated_resume.tex` (requires a LaTeX distribution).")
-            
+            # Download buttons (fragment: button clicks rerun only that block)
+            _render_download_section(final_latex)
+
             # Preview section
             with st.expander("📋 Preview Transformed Resume Content"):
                 st.text(transformed_content)
@@ -418,11 +722,16 @@ def main():
             st.session_state.processing_followup = False
             
         except Exception as e:
-            st.error(f"❌ Error during processing: {str(e)}")
+            # Transient failures are retried with jittered backoff inside
+            # LLMService; reaching here means retries were exhausted
+            message = str(e)
+            if "429" in message or "rate limit" in message.lower():
+                st.error("❌ The provider kept rate-limiting this key even after "
+                         "automatic retries. Wait a minute and try again.")
+            else:
+                st.error(f"❌ Error during processing: {message}")
             st.session_state.processing = False
             st.session_state.processing_followup = False
-            progress_bar.empty()
-            status_text.empty()
 
     # Follow-up refinement interface
     if st.session_state.transformed_content:
@@ -456,18 +765,21 @@ def main():
                 st.session_state.processing_followup = True
                 try:
                     with st.spinner("Applying feedback and updating resume..."):
-                        llm_service = LLMService(provider=st.session_state.provider, api_key=st.session_state.api_key)
+                        # Same memoized service as the transform used
+                        llm_service = get_llm_service(
+                            st.session_state.provider,
+                            _hash_api_key(st.session_state.api_key),
+                            st.session_state.api_key,
+                        )
+                        llm_service.bypass_cache = force_refresh
                         new_content, new_conversation = llm_service.refine_with_feedback(
                             st.session_state.conversation,
                             feedback
                         )
                         
-                        latex_generator = LaTeXGenerator()
-                        latex_template = latex_generator.get_default_template()
+                        latex_template = get_default_latex_template()
                         final_latex = llm_service.format_to_latex(new_content, latex_template)
                         
-                        with tempfile.NamedTemporaryFile(mode='w', suffix='.tex', delete=False, encoding='utf-8') as tmp_tex:
-                            tmp_tex.write(final_latex)
                         st.session_state.transformed_content = new_content
                         st.session_state.latex_output = final_latex
                         st.session_state.conversation = new_conversation